@@ -0,0 +1,191 @@
+"""
+Tests for workflow-example-1.py.
+Run from this directory with: python -m pytest -q
+"""
+
+import asyncio
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HERE = Path(__file__).parent
+spec = importlib.util.spec_from_file_location('workflow_example_1', HERE / 'workflow-example-1.py')
+workflow = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = workflow
+spec.loader.exec_module(workflow)
+
+ROWS = [{'id': i, 'name': f"item{i % 7}", 'value': 100 + i} for i in range(1, 101)]
+CRASH_AT = 55
+
+
+class Crash(Exception):
+    """Raised by the input source to stop a run mid-batch"""
+
+
+def source(crash_at=None):
+    for index, record in enumerate(ROWS):
+        if index == crash_at:
+            raise Crash(f"crashed at row {index + 1}")
+        yield record
+
+
+def run(mode, output, checkpoint, crash_at=None):
+    """Run the pipeline in the given mode over ROWS, optionally crashing partway"""
+    if mode == 'async':
+        pipeline = workflow.AsyncDataPipeline(batch_size=10, output=output, checkpoint=checkpoint)
+        return asyncio.run(pipeline.process_async(source(crash_at)))
+    pipeline = workflow.DataPipeline(batch_size=10, output=output, checkpoint=checkpoint)
+    return pipeline.process_stream(source(crash_at)).summary
+
+
+def read_ids(path):
+    """Record ids in an output file, in file order"""
+    if str(path).endswith(workflow.ColumnarOutputWriter.SUFFIX):
+        batches = workflow.ColumnarOutputWriter.read(path)
+    else:
+        batches = workflow.DataReader.read_batches(path)
+    return [int(record['id']) for batch in batches for record in batch]
+
+
+@pytest.mark.parametrize('mode', ['stream', 'async'])
+@pytest.mark.parametrize('suffix', ['.ndjson', '.csv', '.ndjson.gz', '.cols'])
+def test_resume_after_crash_keeps_committed_output(tmp_path, mode, suffix):
+    output = tmp_path / f"out{suffix}"
+    checkpoint = tmp_path / 'checkpoint.json'
+    
+    with pytest.raises(Crash):
+        run(mode, output, checkpoint, crash_at=CRASH_AT)
+    assert json.loads(checkpoint.read_text())['watermark'] == 50
+    
+    result = run(mode, output, checkpoint)
+    assert read_ids(output) == [record['id'] for record in ROWS]
+    assert result['output']['count'] == len(ROWS)
+    assert result['checkpoint']['totals']['filtered_count'] == len(ROWS)
+    assert result['checkpoint']['skipped_count'] == 50
+
+
+def test_resume_after_killed_process(tmp_path):
+    output = tmp_path / 'out.ndjson'
+    checkpoint = tmp_path / 'checkpoint.json'
+    script = (
+        "import os, sys\n"
+        "sys.path.insert(0, sys.argv[1])\n"
+        "import test_workflow_example_1 as t\n"
+        "def rows():\n"
+        "    for index, record in enumerate(t.ROWS):\n"
+        "        if index == t.CRASH_AT:\n"
+        "            os._exit(3)\n"
+        "        yield record\n"
+        "t.source = lambda crash_at=None: rows()\n"
+        "t.run('stream', sys.argv[2], sys.argv[3])\n"
+    )
+    killed = subprocess.run([sys.executable, '-c', script, str(HERE), str(output), str(checkpoint)])
+    assert killed.returncode == 3
+    
+    result = run('stream', output, checkpoint)
+    assert read_ids(output) == [record['id'] for record in ROWS]
+    assert result['checkpoint']['totals']['filtered_count'] == len(ROWS)
+
+
+def test_process_resumes_output_across_runs(tmp_path):
+    output = tmp_path / 'out.csv'
+    checkpoint = tmp_path / 'checkpoint.json'
+    for end in (50, 100):
+        pipeline = workflow.DataPipeline(batch_size=10, output=output, checkpoint=checkpoint)
+        result = pipeline.process(ROWS[:end])
+    assert read_ids(output) == [record['id'] for record in ROWS]
+    assert result['output']['count'] == len(ROWS)
+
+
+def test_unkeyed_records_do_not_grow_checkpoint_totals(tmp_path):
+    checkpoint = tmp_path / 'checkpoint.json'
+    records = [{'id': 1, 'name': 'a', 'value': 150}, {'name': 'no-id', 'value': 150}]
+    for _ in range(3):
+        result = workflow.DataPipeline(checkpoint=checkpoint).process(records)
+        assert result['checkpoint']['unkeyed_count'] == 1
+        assert result['checkpoint']['totals']['input_count'] == 1
+
+
+def test_missing_output_cannot_resume(tmp_path):
+    output = tmp_path / 'out.ndjson'
+    checkpoint = tmp_path / 'checkpoint.json'
+    with pytest.raises(Crash):
+        run('stream', output, checkpoint, crash_at=CRASH_AT)
+    output.unlink()
+    with pytest.raises(ValueError, match='shorter than its checkpoint'):
+        run('stream', output, checkpoint)
+
+
+def test_default_process_times_each_stage():
+    result = workflow.DataPipeline(batch_size=10).process(ROWS)
+    assert list(result['stage_timings']) == ['validate', 'transform', 'filter', 'aggregate']
+
+
+def test_fused_loop_uses_transform_record(monkeypatch):
+    def doubled(record, factor=1.1):
+        return workflow.DataRecord(id=int(record['id']), name=str(record['name']), value=2 * record['value'])
+    
+    monkeypatch.setattr(workflow.DataTransformer, 'transform_record', staticmethod(doubled))
+    fused = workflow.DataPipeline(batch_size=10, fuse_stages=True).process(ROWS)
+    staged = workflow.DataPipeline(batch_size=10).process(ROWS)
+    assert [record['value'] for record in fused['records']] == [2 * record['value'] for record in ROWS]
+    assert fused['aggregated'] == staged['aggregated']
+
+
+@pytest.mark.parametrize('options', [{'fuse_stages': True}, {'autotune': True}])
+def test_memory_budget_requires_staged_path(options):
+    with pytest.raises(ValueError, match='memory_budget'):
+        workflow.DataPipeline(memory_budget=10, **options)
+
+
+def test_spilled_rows_stay_on_disk_with_output(tmp_path, caplog):
+    output = tmp_path / 'out.ndjson'
+    result = workflow.DataPipeline(batch_size=10, memory_budget=10, spill_dir=tmp_path, output=output).process(ROWS)
+    assert result['spill']['filtered']['spilled_rows'] == len(ROWS)
+    assert 'records' not in result
+    assert read_ids(output) == [record['id'] for record in ROWS]
+    
+    caplog.clear()
+    result = workflow.DataPipeline(batch_size=10, memory_budget=10, spill_dir=tmp_path).process(ROWS)
+    assert len(result['records']) == len(ROWS)
+    assert 'spilled rows back into' in caplog.text
+
+
+def test_cache_key_covers_result_shape(tmp_path):
+    default = workflow.DataPipeline(cache=tmp_path)
+    default.process(ROWS)
+    for options in ({'fuse_stages': True}, {'memory_budget': 1000}, {'aggregate_partitions': 2},
+                    {'executor': 'thread'}, {'autotune': True}):
+        pipeline = workflow.DataPipeline(cache=tmp_path, **options)
+        assert pipeline.cache_key(ROWS) != default.cache_key(ROWS), options
+    spilled = workflow.DataPipeline(memory_budget=1000, cache=tmp_path).process(ROWS)
+    assert not spilled['cache']['hit']
+    assert 'spill' in spilled
+
+
+def test_tuner_converges_on_fastest_size(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(workflow.time, 'perf_counter', lambda: now[0])
+    rate = {10: 50, 20: 80, 40: 100, 80: 90, 28: 95, 57: 95, 48: 98, 34: 98}  # rows/sec by size
+    tuner = workflow.BatchSizeTuner(10, samples=3, window=0.1)
+    for batch in tuner.batches(range(100000)):
+        now[0] += len(batch) / rate.get(len(batch), 60)
+        tuner.observe(len(batch))
+        if tuner.converged:
+            break
+    assert tuner.converged and tuner.size == 40
+
+
+def test_tuner_measures_memory_per_row():
+    limit = 200000
+    tuner = workflow.BatchSizeTuner(1000, memory_limit=limit)
+    rows = ({'id': i, 'name': f"item{i % 7}", 'value': 100 + i % 300} for i in range(1, 50001))
+    for _ in workflow.DataPipeline(autotune=tuner).process_stream(rows):
+        pass
+    assert tuner.bytes_per_row > 0
+    assert tuner.size * tuner.bytes_per_row <= limit
+    assert not workflow.tracemalloc.is_tracing()
@@ -0,0 +1,265 @@
+"""
+Day 1.2 Demo: Benchmarking the Copilot Flow DataPipeline
+Turn 15: "Measure pipeline throughput on synthetic data and catch regressions"
+
+Generates seeded synthetic records (name cardinality, invalid-row rate and
+value distribution are configurable), streams them through DataPipeline at
+several scales and reports rows/sec, peak RSS and per-stage time as JSON.
+Each scale runs in a fresh subprocess so peak RSS is measured per run.
+
+Usage:
+    python workflow-benchmark.py --scales 1e3,1e4,1e5 --output results.json
+    python workflow-benchmark.py --engine batch --save-baseline baseline.json
+    python workflow-benchmark.py --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is reported as None there
+    resource = None
+
+PIPELINE_PATH = Path(__file__).with_name('workflow-example-1.py')
+DEFAULT_SCALES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+def load_pipeline_module():
+    """Import workflow-example-1.py (its file name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location('workflow_example_1', PIPELINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # lets worker processes unpickle its functions
+    spec.loader.exec_module(module)
+    return module
+
+
+class SyntheticDataGenerator:
+    """
+    Seeded generator of raw pipeline records.
+    The same seed and settings always produce the same rows.
+    """
+    
+    DISTRIBUTIONS = ('uniform', 'normal', 'lognormal', 'exponential')
+    INVALID_KINDS = ('missing_id', 'empty_name', 'bad_value', 'missing_value')
+    
+    def __init__(self, seed: int = 42, name_cardinality: int = 100, invalid_rate: float = 0.01,
+                 distribution: str = 'uniform', mean_value: float = 100.0):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {distribution}. Expected one of {list(self.DISTRIBUTIONS)}")
+        if not 0 <= invalid_rate <= 1:
+            raise ValueError("invalid_rate must be between 0 and 1")
+        if name_cardinality < 1:
+            raise ValueError("name_cardinality must be at least 1")
+        
+        self.seed = seed
+        self.name_cardinality = name_cardinality
+        self.invalid_rate = invalid_rate
+        self.distribution = distribution
+        self.mean_value = mean_value
+    
+    def _value_sampler(self, rng: random.Random):
+        """Return a zero-argument function drawing one value"""
+        mean = self.mean_value
+        if self.distribution == 'uniform':
+            return lambda: rng.uniform(0, 2 * mean)
+        if self.distribution == 'normal':
+            return lambda: rng.gauss(mean, mean / 4)
+        if self.distribution == 'lognormal':
+            return lambda: rng.lognormvariate(0, 1) * mean / 1.6487  # E[lognormal(0, 1)] = e^0.5
+        return lambda: rng.expovariate(1 / mean)
+    
+    def records(self, count: int) -> Iterator[Dict]:
+        """Yield count raw records, invalid_rate of them deliberately invalid"""
+        rng = random.Random(self.seed)
+        sample_value = self._value_sampler(rng)
+        names = [f"product_{i}" for i in range(self.name_cardinality)]
+        
+        for record_id in range(1, count + 1):
+            record = {
+                'id': record_id,
+                'name': names[rng.randrange(self.name_cardinality)],
+                'value': round(sample_value(), 2)
+            }
+            if self.invalid_rate and rng.random() < self.invalid_rate:
+                kind = self.INVALID_KINDS[rng.randrange(len(self.INVALID_KINDS))]
+                if kind == 'missing_id':
+                    del record['id']
+                elif kind == 'empty_name':
+                    record['name'] = ''
+                elif kind == 'bad_value':
+                    record['value'] = 'n/a'
+                else:
+                    del record['value']
+            yield record
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_single(rows: int, args: argparse.Namespace) -> Dict:
+    """Stream rows synthetic records through the pipeline in this process"""
+    workflow = load_pipeline_module()
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    generator = SyntheticDataGenerator(args.seed, args.name_cardinality, args.invalid_rate,
+                                       args.distribution)
+    pipeline = workflow.DataPipeline(batch_size=args.batch_size, engine=args.engine,
+                                     executor=args.executor, progress_interval=None)
+    
+    started = time.perf_counter()
+    summary = pipeline.process_stream(generator.records(rows)).summary
+    seconds = time.perf_counter() - started
+    
+    return {
+        'rows': rows,
+        'engine': pipeline.engine,
+        'executor': args.executor,
+        'batch_size': args.batch_size,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds > 0 else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'valid_count': summary['valid_count'],
+        'filtered_count': summary['filtered_count'],
+        'stage_timings': summary['stage_timings']
+    }
+
+
+def run_suite(args: argparse.Namespace) -> Dict:
+    """Run every scale in its own subprocess and collect the results"""
+    results = []
+    for rows in args.scales:
+        command = [sys.executable, str(Path(__file__).resolve()), '--single', str(rows)]
+        command += forwarded_options(args)
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark at {rows} rows failed:\n{completed.stderr}")
+        result = json.loads(completed.stdout)
+        print(f"{rows:>10} rows  {result['rows_per_sec']:>12,.0f} rows/s  "
+              f"peak RSS {result['peak_rss_mb'] or 0:8.1f} MiB", file=sys.stderr)
+        results.append(result)
+    
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'name_cardinality': args.name_cardinality,
+            'invalid_rate': args.invalid_rate,
+            'distribution': args.distribution
+        },
+        'results': results
+    }
+
+
+def forwarded_options(args: argparse.Namespace) -> List[str]:
+    """Command-line options a --single child needs to reproduce this run"""
+    options = ['--seed', str(args.seed), '--name-cardinality', str(args.name_cardinality),
+               '--invalid-rate', str(args.invalid_rate), '--distribution', args.distribution,
+               '--engine', args.engine, '--batch-size', str(args.batch_size)]
+    if args.executor:
+        options += ['--executor', args.executor]
+    return options
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Return a message per regression: throughput lower, or peak RSS higher,
+    than the baseline by more than tolerance (a fraction, e.g. 0.2 = 20%).
+    A report with no run matching the baseline fails too, since nothing was checked.
+    """
+    def key(result: Dict) -> tuple:
+        return result['rows'], result['engine'], result['executor'], result['batch_size']
+    
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    compared = 0
+    for result in report['results']:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        compared += 1
+        if old['rows_per_sec'] and result['rows_per_sec'] < old['rows_per_sec'] * (1 - tolerance):
+            regressions.append(f"{result['rows']} rows: {result['rows_per_sec']:,.0f} rows/s "
+                               f"vs baseline {old['rows_per_sec']:,.0f} rows/s")
+        if old['peak_rss_mb'] and result['peak_rss_mb'] and \
+                result['peak_rss_mb'] > old['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{result['rows']} rows: peak RSS {result['peak_rss_mb']:.1f} MiB "
+                               f"vs baseline {old['peak_rss_mb']:.1f} MiB")
+    if not compared:
+        regressions.append("no results matched the baseline (rows, engine, executor, batch size)")
+    return regressions
+
+
+def parse_scales(text: str) -> List[int]:
+    """Parse '1e3,1e4,50000' into [1000, 10000, 50000]"""
+    return [int(float(part)) for part in text.split(',') if part.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark DataPipeline on synthetic data")
+    parser.add_argument('--scales', type=parse_scales, default=DEFAULT_SCALES,
+                        help="comma-separated row counts (default: 1e3,1e4,1e5,1e6,1e7)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--name-cardinality', type=int, default=100)
+    parser.add_argument('--invalid-rate', type=float, default=0.01)
+    parser.add_argument('--distribution', choices=SyntheticDataGenerator.DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--engine', choices=['records', 'batch', 'columnar'], default='records')
+    parser.add_argument('--executor', choices=['process', 'thread'], default=None)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--save-baseline', help="also store the report as a baseline file")
+    parser.add_argument('--compare', help="baseline file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown / RSS growth vs the baseline (default: 0.2)")
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.single is not None:
+        print(json.dumps(run_single(args.single, args)))
+        return 0
+    
+    report = run_suite(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text + '\n', encoding='utf-8')
+    
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION: {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
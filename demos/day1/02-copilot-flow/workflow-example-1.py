@@ -8,14 +8,66 @@ Turn 2: "Add error handling and logging"
 Turn 3: "Include validation before processing"
 Turn 4: "Optimize for performance with batch processing"
 Turn 5: "Add progress tracking"
+Turn 6: "Stream any iterable through the pipeline with flat memory"
+Turn 7: "Transform batches in parallel on a worker pool"
+Turn 8: "Add a vectorized columnar engine"
+Turn 9: "Make aggregates mergeable across batches and runs"
+Turn 10: "Store transformed rows as compact record batches"
+Turn 11: "Throttle progress reporting and time each stage"
+Turn 12: "Compile declarative validation rules per feed"
+Turn 13: "Run the stages concurrently with asyncio and backpressure"
+Turn 14: "Read NDJSON and CSV exports in chunks instead of loading them"
+Turn 16: "Send invalid records to a dead-letter file instead of the log"
+Turn 17: "Shard the aggregation by name across worker processes"
+Turn 18: "Offer approximate aggregates with bounded memory for high-cardinality names"
+Turn 19: "Stream results to NDJSON, CSV or binary columnar files instead of returning them"
+Turn 20: "Checkpoint runs so an hourly job only processes new records"
+Turn 21: "Fuse validate/transform/filter into one pass and make the constants configurable"
+Turn 22: "Spill batches to a memory-mapped file when they exceed a memory budget"
+Turn 23: "Cache results on disk so identical inputs are not processed twice"
+Turn 24: "Tune the batch size automatically from measured throughput and memory"
 """
 
+import asyncio
+import csv
+import gzip
+import hashlib
+import heapq
+import inspect
+import io
 import json
 import logging
-from typing import List, Dict, Optional
+import math
+import mmap
+import multiprocessing
+import operator
+import os
+import queue
+import random
+import re
+import sqlite3
+import struct
+import sys
+import tempfile
+import traceback
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import partial, reduce
+from typing import List, Dict, Optional, Iterable, Iterator, Callable, Union, Any, AsyncIterable
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import chain, compress, islice
+from pathlib import Path
 import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:  # Turn 8: NumPy is optional; without it the columnar engine falls back
+    np = None
 
 # Configure logging - Added in Turn 2
 logging.basicConfig(
@@ -25,138 +77,2266 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class DataRecord:
-    """Represents a single data record"""
-    id: int
-    name: str
-    value: float
-    timestamp: str = None
+@dataclass
+class DataRecord:
+    """Represents a single data record"""
+    id: int
+    name: str
+    value: float
+    timestamp: str = None
+    
+    def __post_init__(self):
+        if self.timestamp is None:
+            self.timestamp = datetime.now().isoformat()
+
+
+@dataclass
+class FieldRule:
+    """
+    Turn 12: Declarative validation rule for one field.
+    - required: the field must be present
+    - allow_empty: when False, falsy values (None, '', 0) count as missing
+    - type: optional isinstance() check on the raw value
+    - coerce: optional converter (e.g. float); failures mark the value invalid
+    - min_value / max_value: inclusive bounds on the (coerced) value; NaN is out
+      of range and a value that cannot be compared is an invalid type
+    """
+    name: str
+    required: bool = True
+    allow_empty: bool = False
+    type: Optional[Union[type, tuple]] = None
+    coerce: Optional[Callable] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    
+    def fingerprint(self) -> Dict:
+        """
+        Turn 23: Description of the rule that stays the same across runs, for
+        cache keys. Types and callables are named by module and qualified name
+        rather than by repr(), which embeds a memory address; lambdas all share
+        one name, so bump TRANSFORM_VERSION when changing one used as coerce.
+        """
+        def qualified(obj: Any) -> Any:
+            if isinstance(obj, tuple):
+                return [qualified(item) for item in obj]
+            if obj is None:
+                return None
+            return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+        
+        return {**asdict(self), 'type': qualified(self.type), 'coerce': qualified(self.coerce)}
+
+
+class CompiledValidator:
+    """
+    Turn 12: Compiles a list of FieldRules once into generated Python code.
+    check(record) returns None for a valid record or the error message;
+    validate_batch(records) partitions a batch in a single inlined loop,
+    without a (is_valid, error) tuple per record.
+    """
+    
+    MISSING = "Missing required field: {field}"
+    INVALID_TYPE = "Invalid {field} type: "
+    OUT_OF_RANGE = "Field {field} out of range: "
+    # Turn 16: message pattern -> stable error code prefix
+    ERROR_CODES = [
+        (re.compile(r"Missing required field: (.+)"), 'missing_field'),
+        (re.compile(r"Invalid (.+?) type: "), 'invalid_type'),
+        (re.compile(r"Field (.+?) out of range: "), 'out_of_range')
+    ]
+    
+    def __init__(self, rules: List[FieldRule]):
+        self.rules = list(rules)
+        self.source, namespace = self._generate(self.rules)
+        exec(compile(self.source, f"<CompiledValidator {[r.name for r in self.rules]}>", 'exec'), namespace)
+        self.check: Callable[[Dict], Optional[str]] = namespace['check']
+        self._validate_batch = namespace['validate_batch']
+    
+    @classmethod
+    def from_dict(cls, schema: Dict[str, Dict]) -> "CompiledValidator":
+        """Build from {'field': {'required': True, 'coerce': float, ...}, ...}"""
+        return cls([FieldRule(name, **options) for name, options in schema.items()])
+    
+    @staticmethod
+    def error_code(message: str) -> str:
+        """Turn 16: Map an error message to a code such as 'missing_field:id'"""
+        for pattern, code in CompiledValidator.ERROR_CODES:
+            match = pattern.match(message)
+            if match:
+                return f"{code}:{match.group(1)}"
+        return 'other'
+    
+    def validate_record(self, record: Dict) -> tuple[bool, str]:
+        """Same contract as DataValidator.validate_record"""
+        error = self.check(record)
+        return error is None, error or ""
+    
+    def validate_batch(self, records: Iterable[Dict]) -> tuple[List[Dict], List[Dict]]:
+        """Returns (valid_records, invalid_records) like DataValidator.validate_batch"""
+        return self._validate_batch(records)
+    
+    def __reduce__(self):
+        """Turn 21: Pickle by rules; the generated code is rebuilt on unpickling"""
+        return self.__class__, (self.rules,)
+    
+    @staticmethod
+    def check_lines(rules: List[FieldRule]) -> tuple[List[str], Dict]:
+        """
+        Turn 21: Checks for one record in 'record' as source lines plus the
+        names they reference. A failing check is a FAIL(message) line; see render().
+        """
+        namespace = {}
+        body = []
+        for i, rule in enumerate(rules):
+            key = repr(rule.name)
+            missing = CompiledValidator.MISSING.format(field=rule.name)
+            invalid = CompiledValidator.INVALID_TYPE.format(field=rule.name)
+            out_of_range = CompiledValidator.OUT_OF_RANGE.format(field=rule.name)
+            
+            # Presence is either "truthy" (like record.get(...)) or "key exists"
+            if rule.required and rule.allow_empty:
+                body += [f"if {key} not in record:", f"    FAIL({missing!r})", f"v = record[{key}]"]
+            elif rule.required:
+                body += [f"v = record.get({key})", "if not v:", f"    FAIL({missing!r})"]
+            
+            checks = []
+            if rule.type is not None:
+                namespace[f'type_{i}'] = rule.type
+                checks += [f"if not isinstance(v, type_{i}):",
+                           f"    FAIL({invalid!r} + str(v))"]
+            if rule.coerce is not None:
+                namespace[f'coerce_{i}'] = rule.coerce
+                checks += ["try:",
+                           f"    v = coerce_{i}(v)",
+                           "except (ValueError, TypeError):",
+                           f"    FAIL({invalid!r} + str(v))"]
+            bounds = []
+            if rule.min_value is not None:
+                namespace[f'min_{i}'] = rule.min_value
+                bounds.append(f"min_{i} <=")
+            bounds.append("v")
+            if rule.max_value is not None:
+                namespace[f'max_{i}'] = rule.max_value
+                bounds.append(f"<= max_{i}")
+            if len(bounds) > 1:
+                # Written as "within bounds" so NaN fails; uncomparable values are invalid
+                checks += ["try:",
+                           f"    in_range = {' '.join(bounds)}",
+                           "except TypeError:",
+                           f"    FAIL({invalid!r} + str(v))",
+                           "if not in_range:",
+                           f"    FAIL({out_of_range!r} + str(v))"]
+            
+            if rule.required:
+                body += checks
+            elif checks:
+                # Optional fields are only checked when present
+                if rule.allow_empty:
+                    body += [f"if {key} in record:", f"    v = record[{key}]"]
+                else:
+                    body += [f"v = record.get({key})", "if v:"]
+                body += ["    " + line for line in checks]
+        return body, namespace
+    
+    @staticmethod
+    def render(body: List[str], indent: str, on_fail: Callable[[str], List[str]]) -> List[str]:
+        """Indent check_lines() output, replacing each FAIL(message) with on_fail(message)"""
+        rendered = []
+        for line in body:
+            stripped = line.lstrip()
+            if stripped.startswith("FAIL("):
+                nested = indent + line[:len(line) - len(stripped)]
+                rendered += [nested + fail_line for fail_line in on_fail(stripped[len("FAIL("):-1])]
+            else:
+                rendered.append(indent + line)
+        return rendered
+    
+    @staticmethod
+    def _generate(rules: List[FieldRule]) -> tuple[str, Dict]:
+        """Emit source for check() and validate_batch() plus the names it references"""
+        body, namespace = CompiledValidator.check_lines(rules)
+        render = partial(CompiledValidator.render, body)
+        lines = ["def check(record):"]
+        lines += render("    ", lambda message: [f"return {message}"])
+        lines += ["    return None", "",
+                  "def validate_batch(records):",
+                  "    valid = []",
+                  "    invalid = []",
+                  "    add_valid = valid.append",
+                  "    add_invalid = invalid.append",
+                  "    for record in records:"]
+        # In the batch loop a failure records the error and moves on
+        lines += render("        ", lambda message: [f"add_invalid({{'record': record, 'error': {message}}})",
+                                                     "continue"])
+        lines += ["        add_valid(record)",
+                  "    return valid, invalid", ""]
+        return "\n".join(lines), namespace
+
+
+class DataValidator:
+    """
+    Turn 3: Added validation before processing
+    Turn 12: Backed by a CompiledValidator built from DEFAULT_RULES
+    """
+    
+    DEFAULT_RULES = [
+        FieldRule('id'),
+        FieldRule('name'),
+        FieldRule('value', allow_empty=True, coerce=float)
+    ]
+    
+    @staticmethod
+    def validate_record(record: Dict) -> tuple[bool, str]:
+        """
+        Validate a single record before processing.
+        Returns (is_valid, error_message)
+        """
+        return DEFAULT_VALIDATOR.validate_record(record)
+    
+    @staticmethod
+    def validate_batch(records: List[Dict]) -> tuple[List[Dict], List[Dict]]:
+        """
+        Validate batch of records.
+        Returns (valid_records, invalid_records)
+        """
+        return DEFAULT_VALIDATOR.validate_batch(records)
+
+
+DEFAULT_VALIDATOR = CompiledValidator(DataValidator.DEFAULT_RULES)
+
+
+class AggregateState:
+    """
+    Turn 9: Compact, mergeable running aggregate for one group.
+    Keeps count, total, min and max; the average is derived only when read,
+    so partial states from batches, workers or earlier runs can be combined
+    without reprocessing raw records.
+    """
+    
+    __slots__ = ('count', 'total', 'min', 'max')
+    
+    def __init__(self, count: int = 0, total: float = 0.0,
+                 min: float = float('inf'), max: float = float('-inf')):
+        self.count = count
+        self.total = total
+        self.min = min
+        self.max = max
+    
+    def update(self, value: float) -> None:
+        """Add a single value"""
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def update_many(self, values: Iterable[float]) -> None:
+        """Add many values at once; totals are summed in order like update()"""
+        values = values if isinstance(values, (list, tuple)) else list(values)
+        if not values:
+            return
+        self.count += len(values)
+        self.total = reduce(operator.add, values, self.total)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+    
+    def merge(self, other: "AggregateState") -> "AggregateState":
+        """Fold another partial state into this one and return self"""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+    
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0
+    
+    def to_dict(self) -> Dict:
+        """Render in the aggregate_by_name output format"""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'average': self.average,
+            'max': self.max,
+            'min': self.min
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AggregateState":
+        """Rebuild a state from the aggregate_by_name output format"""
+        return cls(data['count'], data['total'], data['min'], data['max'])
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AggregateState):
+            return NotImplemented
+        return (self.count, self.total, self.min, self.max) == (other.count, other.total, other.min, other.max)
+    
+    def __repr__(self) -> str:
+        return (f"AggregateState(count={self.count}, total={self.total}, "
+                f"min={self.min}, max={self.max})")
+
+
+class DataTransformer:
+    """Transforms raw data into processed format"""
+    
+    @staticmethod
+    def transform_record(record: Dict, factor: float = 1.1) -> Optional[DataRecord]:
+        """
+        Transform raw dictionary into DataRecord.
+        Turn 2: Added error handling
+        Turn 21: factor is configurable (default: 10% increase)
+        """
+        try:
+            return DataRecord(
+                id=int(record['id']),
+                name=str(record['name']).strip().upper(),
+                value=float(record['value']) * factor
+            )
+        except (KeyError, ValueError, TypeError) as e:
+            logger.warning(f"Failed to transform record: {record}. Error: {e}")
+            return None
+    
+    @staticmethod
+    def filter_by_value(records: List[DataRecord], min_value: float) -> List[DataRecord]:
+        """Filter records by minimum value threshold"""
+        return [r for r in records if r.value >= min_value]
+    
+    @staticmethod
+    def aggregate_states(records: Iterable[DataRecord],
+                         states: Optional[Dict[str, AggregateState]] = None) -> Dict[str, AggregateState]:
+        """Turn 9: Accumulate records into per-name AggregateState objects"""
+        if states is None:
+            states = {}
+        for record in records:
+            state = states.get(record.name)
+            if state is None:
+                state = states[record.name] = AggregateState()
+            state.update(record.value)
+        
+        return states
+    
+    @staticmethod
+    def merge_states(target: Dict[str, AggregateState],
+                     other: Dict[str, AggregateState]) -> Dict[str, AggregateState]:
+        """Turn 9: Merge per-name states from another batch, worker or run into target"""
+        for name, state in other.items():
+            if name in target:
+                target[name].merge(state)
+            else:
+                target[name] = AggregateState().merge(state)
+        return target
+    
+    @staticmethod
+    def aggregate_by_name_partitioned(records: Iterable[Union[List[DataRecord], "RecordBatch"]],
+                                      num_partitions: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Turn 17: aggregate_by_name over batches of records, hash-sharded by
+        name across num_partitions worker processes (see PartitionedAggregator).
+        Names are grouped by partition, so key order may differ from aggregate_by_name.
+        """
+        with PartitionedAggregator(num_partitions) as aggregator:
+            for batch in records:
+                aggregator.add(batch)
+            return DataTransformer.render_states(aggregator.result())
+    
+    @staticmethod
+    def render_states(states: Dict[str, AggregateState]) -> Dict[str, Dict]:
+        """Turn 9: Convert per-name states into the aggregate_by_name output format"""
+        return {name: state.to_dict() for name, state in states.items()}
+    
+    @staticmethod
+    def aggregate_by_name(records: Iterable[DataRecord],
+                          aggregated: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Aggregate records by name.
+        Turn 6: Pass an existing result as `aggregated` to keep accumulating into it.
+        Turn 9: Built on AggregateState; the average is computed once per name.
+        """
+        states = {name: AggregateState.from_dict(agg) for name, agg in (aggregated or {}).items()}
+        DataTransformer.aggregate_states(records, states)
+        
+        if aggregated is None:
+            aggregated = {}
+        aggregated.update(DataTransformer.render_states(states))
+        return aggregated
+
+
+@dataclass
+class RecordBatch:
+    """
+    Turn 10: Struct-of-arrays container for transformed records.
+    Ids, names and values live in compact columns (array.array, or NumPy
+    arrays for the columnar engine) and the whole batch shares a single
+    timestamp, instead of one DataRecord object per row.
+    """
+    ids: Union[array, list, "np.ndarray"]
+    names: Union[list, "np.ndarray"]
+    values: Union[array, "np.ndarray"]
+    timestamp: str = None
+    
+    def __post_init__(self):
+        if self.timestamp is None:
+            self.timestamp = datetime.now().isoformat()
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, index: int) -> DataRecord:
+        """Build a DataRecord view of one row on access"""
+        return DataRecord(
+            id=int(self.ids[index]),
+            name=self.names[index],
+            value=float(self.values[index]),
+            timestamp=self.timestamp
+        )
+    
+    def __iter__(self) -> Iterator[DataRecord]:
+        """Materialize DataRecord views lazily, one row at a time"""
+        ids, names, values = self.ids, self.names, self.values
+        if self.is_numpy:
+            ids, names, values = ids.tolist(), names.tolist(), values.tolist()
+        for record_id, name, value in zip(ids, names, values):
+            yield DataRecord(id=record_id, name=name, value=value, timestamp=self.timestamp)
+    
+    @property
+    def is_numpy(self) -> bool:
+        return np is not None and isinstance(self.values, np.ndarray)
+    
+    def select(self, mask: Union[List[bool], "np.ndarray"]) -> "RecordBatch":
+        """Return the rows where mask is true, keeping the batch timestamp"""
+        if self.is_numpy:
+            return RecordBatch(self.ids[mask], self.names[mask], self.values[mask], self.timestamp)
+        ids = list(compress(self.ids, mask))
+        if isinstance(self.ids, array):
+            ids = array(self.ids.typecode, ids)
+        return RecordBatch(
+            ids=ids,
+            names=list(compress(self.names, mask)),
+            values=array('d', compress(self.values, mask)),
+            timestamp=self.timestamp
+        )
+    
+    @staticmethod
+    def extract_columns(records: List[Dict]) -> tuple[list, list, list]:
+        """
+        Apply the transform_record rules column-wise, dropping failures.
+        Returns (ids, names, raw_values); names are interned so repeated
+        names share one string object.
+        """
+        ids, names, values = [], [], []
+        for record in records:
+            try:
+                record_id = int(record['id'])
+                name = sys.intern(str(record['name']).strip().upper())
+                value = float(record['value'])
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning(f"Failed to transform record: {record}. Error: {e}")
+                continue
+            ids.append(record_id)
+            names.append(name)
+            values.append(value)
+        return ids, names, values
+
+
+class BatchTransformer:
+    """
+    Turn 10: DataTransformer counterpart for array-backed RecordBatch objects.
+    Pure Python, so it works without NumPy; outputs match DataTransformer.
+    """
+    
+    @staticmethod
+    def transform_batch(records: List[Dict], factor: float = 1.1) -> RecordBatch:
+        """Transform validated dicts into one RecordBatch"""
+        ids, names, values = RecordBatch.extract_columns(records)
+        try:
+            ids = array('q', ids)
+        except OverflowError:
+            pass  # ids beyond 64 bits stay in a plain list
+        return RecordBatch(
+            ids=ids,
+            names=names,
+            values=array('d', [value * factor for value in values])
+        )
+    
+    @staticmethod
+    def filter_by_value(batch: RecordBatch, min_value: float) -> RecordBatch:
+        """Filter records by minimum value threshold"""
+        return batch.select([value >= min_value for value in batch.values])
+    
+    @staticmethod
+    def aggregate_states(batch: RecordBatch,
+                         states: Optional[Dict[str, AggregateState]] = None) -> Dict[str, AggregateState]:
+        """Accumulate a batch into per-name AggregateState objects"""
+        if states is None:
+            states = {}
+        for name, value in zip(batch.names, batch.values):
+            state = states.get(name)
+            if state is None:
+                state = states[name] = AggregateState()
+            state.update(value)
+        return states
+    
+    @staticmethod
+    def aggregate_by_name(batch: RecordBatch,
+                          aggregated: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """Group-by-name count/total/average/min/max in the DataTransformer format"""
+        states = {name: AggregateState.from_dict(agg) for name, agg in (aggregated or {}).items()}
+        BatchTransformer.aggregate_states(batch, states)
+        
+        if aggregated is None:
+            aggregated = {}
+        aggregated.update(DataTransformer.render_states(states))
+        return aggregated
+
+
+class ColumnarTransformer:
+    """
+    Turn 8: Vectorized counterpart of DataTransformer.
+    Produces exactly the same records and dict-of-dicts aggregates, but the
+    transform, filter and group-by run as NumPy array operations.
+    Turn 10: Operates on NumPy-backed RecordBatch objects.
+    """
+    
+    @staticmethod
+    def available() -> bool:
+        """True when NumPy is installed"""
+        return np is not None
+    
+    @staticmethod
+    def transform_batch(records: List[Dict], factor: float = 1.1) -> RecordBatch:
+        """Transform validated dicts into NumPy columns, dropping failures like transform_record"""
+        ids, names, values = RecordBatch.extract_columns(records)
+        try:
+            id_column = np.array(ids, dtype=np.int64)
+        except OverflowError:
+            id_column = np.array(ids, dtype=object)
+        
+        return RecordBatch(
+            ids=id_column,
+            names=np.array(names, dtype=object),
+            values=np.array(values, dtype=np.float64) * factor
+        )
+    
+    @staticmethod
+    def filter_by_value(batch: RecordBatch, min_value: float) -> RecordBatch:
+        """Filter records by minimum value threshold with a boolean mask"""
+        return batch.select(batch.values >= min_value)
+    
+    @staticmethod
+    def aggregate_states(batch: RecordBatch,
+                         states: Optional[Dict[str, AggregateState]] = None) -> Dict[str, AggregateState]:
+        """
+        Group-by-name count/total/min/max into AggregateState objects.
+        Sums use unbuffered np.add.at, which adds in record order, so totals
+        match the sequential dict path bit for bit, also when accumulating
+        into existing states.
+        """
+        if states is None:
+            states = {}
+        if len(batch) == 0:
+            return states
+        
+        names, first_index, inverse = np.unique(batch.names, return_index=True, return_inverse=True)
+        names = names.tolist()
+        previous = [states.get(name) or AggregateState() for name in names]
+        
+        counts = np.array([state.count for state in previous], dtype=np.int64)
+        totals = np.array([state.total for state in previous], dtype=np.float64)
+        maxima = np.array([state.max for state in previous], dtype=np.float64)
+        minima = np.array([state.min for state in previous], dtype=np.float64)
+        
+        np.add.at(counts, inverse, 1)
+        np.add.at(totals, inverse, batch.values)
+        np.maximum.at(maxima, inverse, batch.values)
+        np.minimum.at(minima, inverse, batch.values)
+        
+        counts, totals = counts.tolist(), totals.tolist()
+        maxima, minima = maxima.tolist(), minima.tolist()
+        
+        # New names are inserted in first-occurrence order, like the dict path
+        for i in np.argsort(first_index, kind='stable').tolist():
+            states[names[i]] = AggregateState(counts[i], totals[i], minima[i], maxima[i])
+        
+        return states
+    
+    @staticmethod
+    def aggregate_by_name(batch: RecordBatch,
+                          aggregated: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """Group-by-name count/total/average/min/max in the DataTransformer format"""
+        states = {name: AggregateState.from_dict(agg) for name, agg in (aggregated or {}).items()}
+        ColumnarTransformer.aggregate_states(batch, states)
+        
+        if aggregated is None:
+            aggregated = {}
+        aggregated.update(DataTransformer.render_states(states))
+        return aggregated
+
+
+class LoggerProgressSink:
+    """Turn 11: Progress sink that renders a progress bar through the module logger"""
+    
+    def __call__(self, snapshot: Dict) -> None:
+        current, total = snapshot['current'], snapshot['total']
+        if total:
+            filled = int(20 * min(current, total) / total)
+            bar = '█' * filled + '░' * (20 - filled)
+            logger.info(f"{snapshot['name']} [{bar}] {snapshot['percent']:.1f}% ({current}/{total}) "
+                        f"Elapsed: {snapshot['elapsed']:.1f}s Remaining: {snapshot['remaining']:.1f}s")
+        else:
+            logger.info(f"{snapshot['name']} {current} records "
+                        f"Elapsed: {snapshot['elapsed']:.1f}s Rate: {snapshot['rate']:.0f}/s")
+
+
+class MetricsProgressSink:
+    """Turn 11: Progress sink that keeps snapshots in memory for inspection"""
+    
+    def __init__(self, max_snapshots: int = 1000):
+        self.snapshots = deque(maxlen=max_snapshots)
+    
+    def __call__(self, snapshot: Dict) -> None:
+        self.snapshots.append(snapshot)
+    
+    @property
+    def last(self) -> Optional[Dict]:
+        return self.snapshots[-1] if self.snapshots else None
+
+
+class ProgressTracker:
+    """
+    Turn 5: Added progress tracking
+    Turn 11: Reports are throttled by time (min_interval seconds) and/or
+    count (every N items) and sent to pluggable sinks. A sink is any
+    callable taking a snapshot dict, e.g. LoggerProgressSink,
+    MetricsProgressSink or a plain callback.
+    """
+    
+    def __init__(self, total: Optional[int], name: str = "Processing",
+                 min_interval: Optional[float] = 1.0, every: Optional[int] = None,
+                 sinks: Optional[List[Callable[[Dict], None]]] = None):
+        self.total = total
+        self.current = 0
+        self.name = name
+        self.min_interval = min_interval
+        self.every = every
+        self.sinks = [LoggerProgressSink()] if sinks is None else sinks
+        self.start_time = time.monotonic()
+        self._last_report_time = self.start_time
+        self._last_report_count = 0
+    
+    def update(self, amount: int = 1):
+        """Update progress, reporting only when a throttle threshold is crossed"""
+        self.current += amount
+        if self.total is not None and self.current >= self.total:
+            self._report()
+        elif self.every is not None and self.current - self._last_report_count >= self.every:
+            self._report()
+        elif self.min_interval is not None and time.monotonic() - self._last_report_time >= self.min_interval:
+            self._report()
+    
+    def finish(self):
+        """Send a final report unless the latest count was already reported"""
+        if self.current != self._last_report_count or self.current == 0:
+            self._report()
+    
+    def snapshot(self) -> Dict:
+        """Current progress as a plain dict"""
+        elapsed = time.monotonic() - self.start_time
+        rate = self.current / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            percent = (self.current / self.total) * 100
+            remaining = (self.total - self.current) / rate if rate > 0 else 0.0
+        else:
+            percent = None
+            remaining = None
+        
+        return {
+            'name': self.name,
+            'current': self.current,
+            'total': self.total,
+            'percent': percent,
+            'elapsed': elapsed,
+            'rate': rate,
+            'remaining': remaining
+        }
+    
+    def _report(self):
+        """Send a snapshot to every sink"""
+        self._last_report_time = time.monotonic()
+        self._last_report_count = self.current
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink(snapshot)
+
+
+class StageTimer:
+    """
+    Turn 11: Accumulates wall-clock time per pipeline stage.
+    Stages may nest; a parent stage is only charged for time not spent in
+    its children, so the totals add up to the time actually measured.
+    """
+    
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._stack: List[List] = []
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+    
+    def add(self, name: str, seconds: float) -> None:
+        """Turn 13: Record a duration measured elsewhere (e.g. across awaits)"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+    
+    def as_dict(self) -> Dict[str, float]:
+        """Seconds spent per stage, in the order stages were first seen"""
+        return dict(self.timings)
+
+
+class SpaceSavingCounter:
+    """
+    Turn 18: Top-K heavy hitters in O(capacity) memory (SpaceSaving).
+    Once capacity names are tracked, a new name replaces the least frequent
+    one and inherits its count as an error bound, so every reported count
+    overestimates the true count by at most error <= seen / capacity.
+    """
+    
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.seen = 0
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._heap: List[tuple] = []  # (count, name) per tracked name; a count may be stale (too low)
+    
+    def update(self, name: str) -> Optional[str]:
+        """Count one occurrence of name; return the name it evicted, if any"""
+        self.seen += 1
+        counts = self.counts
+        if name in counts:
+            counts[name] += 1
+            return None
+        
+        if len(counts) < self.capacity:
+            counts[name] = 1
+            self.errors[name] = 0
+            heapq.heappush(self._heap, (1, name))
+            return None
+        
+        # Counts only grow, so a popped entry is the minimum once its count is current
+        while True:
+            count, evicted = heapq.heappop(self._heap)
+            if counts[evicted] == count:
+                break
+            heapq.heappush(self._heap, (counts[evicted], evicted))
+        del counts[evicted], self.errors[evicted]
+        counts[name] = count + 1
+        self.errors[name] = count
+        heapq.heappush(self._heap, (count + 1, name))
+        return evicted
+    
+    def top(self, k: Optional[int] = None) -> List[tuple]:
+        """(name, count, error) for the k most frequent names, most frequent first"""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return [(name, count, self.errors[name]) for name, count in ranked[:k]]
+
+
+class HyperLogLog:
+    """
+    Turn 18: Distinct-count estimate in 2 ** precision bytes.
+    Relative standard error is about 1.04 / sqrt(2 ** precision).
+    """
+    
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    @classmethod
+    def for_error(cls, relative_error: float) -> "HyperLogLog":
+        """Smallest sketch whose standard error is at most relative_error"""
+        precision = math.ceil(2 * math.log2(1.04 / relative_error))
+        return cls(min(max(precision, 4), 18))
+    
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+    
+    def update(self, name: str) -> None:
+        hashed = int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+    
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small cardinalities
+        return round(raw)
+
+
+class QuantileSketch:
+    """
+    Turn 18: KLL-style quantile sketch in O(k) memory.
+    Items live in levels of compactors; a full level is sorted and every
+    other item moves up with twice the weight. Rank error is roughly 1.7 / k.
+    """
+    
+    def __init__(self, k: int = 200, rng: Optional[random.Random] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self._rng = rng or random.Random()
+        self._levels: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+    
+    @classmethod
+    def for_error(cls, rank_error: float, rng: Optional[random.Random] = None) -> "QuantileSketch":
+        return cls(max(8, math.ceil(1.7 / rank_error)), rng)
+    
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return math.ceil(self.k * (2 / 3) ** depth) + 1
+    
+    def update(self, value: float) -> None:
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._levels[0].append(value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+    
+    def _compress(self) -> None:
+        for level in range(len(self._levels)):
+            items = self._levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append([])
+                    self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+                items.sort()
+                self._levels[level + 1].extend(items[self._rng.randrange(2)::2])
+                self._levels[level] = []
+                self._size = sum(len(items) for items in self._levels)
+                if self._size < self._max_size:
+                    break
+    
+    def quantiles(self, fractions: Iterable[float]) -> List[Optional[float]]:
+        """Approximate value at each fraction (0..1) of the sorted input"""
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self._levels) for value in items)
+        if not weighted:
+            return [None for _ in fractions]
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            target, cumulative = fraction * total, 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    break
+            results.append(value)
+        return results
+
+
+class ApproximateAggregates:
+    """
+    Turn 18: Bounded-memory alternative to exact per-name aggregation.
+    Tracks the top_k most frequent names (SpaceSaving), the number of
+    distinct names (HyperLogLog) and value quantiles per tracked name (KLL).
+    Memory depends on top_k and the error settings, not on the number of
+    names. A name that is evicted loses its quantile sketch; if it returns
+    it starts a new one, so its quantiles only describe the quantile_rows
+    values seen since then. They cover every row of the name when its
+    count_error is 0.
+    """
+    
+    # Names tracked per reported name, so a top name is rarely evicted and re-admitted
+    TRACKED_PER_TOP_NAME = 10
+    
+    def __init__(self, top_k: int = 100, count_error: Optional[float] = None,
+                 distinct_error: float = 0.01, quantile_error: float = 0.01,
+                 quantiles: Iterable[float] = (0.5, 0.95, 0.99), seed: Optional[int] = None,
+                 tracked: Optional[int] = None):
+        """
+        tracked is the number of names counted and sketched (default: 10 x top_k).
+        count_error bounds heavy-hitter overcounting as a fraction of all rows;
+        it raises the number of tracked names further when needed.
+        """
+        tracked = tracked or top_k * self.TRACKED_PER_TOP_NAME
+        if count_error:
+            tracked = max(tracked, math.ceil(1 / count_error))
+        if tracked < top_k:
+            raise ValueError("tracked must be at least top_k")
+        self.top_k = top_k
+        self.quantile_fractions = tuple(quantiles)
+        self.quantile_error = quantile_error
+        self.heavy_hitters = SpaceSavingCounter(tracked)
+        self.distinct = HyperLogLog.for_error(distinct_error)
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self._rng = random.Random(seed)
+    
+    def update(self, name: str, value: float) -> None:
+        self._observe(name, value)
+        self.distinct.update(name)
+    
+    def _observe(self, name: str, value: float) -> None:
+        """Count and sketch one value (everything except the distinct count)"""
+        evicted = self.heavy_hitters.update(name)
+        if evicted is not None:
+            del self.sketches[evicted]
+        sketch = self.sketches.get(name)
+        if sketch is None:
+            sketch = self.sketches[name] = QuantileSketch.for_error(self.quantile_error, self._rng)
+        sketch.update(value)
+    
+    def add(self, records: Union[List[DataRecord], "RecordBatch"]) -> None:
+        """Fold a batch of transformed records into the sketches"""
+        if isinstance(records, RecordBatch):
+            names, values = records.names, records.values
+            if records.is_numpy:
+                names, values = names.tolist(), values.tolist()
+        else:
+            names = [record.name for record in records]
+            values = [record.value for record in records]
+        observe = self._observe
+        for name, value in zip(names, values):
+            observe(name, value)
+        # Adding a name to a HyperLogLog twice changes nothing, so hash each batch name once
+        for name in set(names):
+            self.distinct.update(name)
+    
+    def to_dict(self) -> Dict:
+        """
+        Summary with error bounds; counts may overestimate by up to count_error.
+        min, max and quantiles per name cover its quantile_rows sketched values.
+        """
+        top_names = {}
+        for name, count, error in self.heavy_hitters.top(self.top_k):
+            sketch = self.sketches[name]
+            values = sketch.quantiles(self.quantile_fractions)
+            top_names[name] = {
+                'count': count,
+                'count_error': error,
+                'quantile_rows': sketch.count,
+                'min': sketch.min,
+                'max': sketch.max,
+                'quantiles': {f"p{fraction * 100:g}": value
+                              for fraction, value in zip(self.quantile_fractions, values)}
+            }
+        return {
+            'approximate': True,
+            'rows': self.heavy_hitters.seen,
+            'distinct_names': self.distinct.estimate(),
+            'distinct_names_error': self.distinct.relative_error,
+            'quantile_rank_error': self.quantile_error,
+            'top_names': top_names
+        }
+
+
+def _partition_worker(inbox: "multiprocessing.Queue", outbox: "multiprocessing.Queue", index: int) -> None:
+    """Turn 17: Worker loop that aggregates every (names, values) chunk of one partition"""
+    try:
+        states: Dict[str, AggregateState] = {}
+        while (chunk := inbox.get()) is not None:
+            names, values = chunk
+            for name, value in zip(names, values):
+                state = states.get(name)
+                if state is None:
+                    state = states[name] = AggregateState()
+                state.update(value)
+        outbox.put((index, states, None))
+    except Exception:
+        outbox.put((index, None, traceback.format_exc()))
+
+
+class PartitionedAggregator:
+    """
+    Turn 17: Hash-partitions records by name across worker processes.
+    Each worker owns every name in its partition, so partial states never
+    need merging and no single process holds all names. Chunks travel over
+    bounded queues, so a slow worker throttles the producer. This is the
+    single-machine stand-in for sharding the aggregation across nodes.
+    """
+    
+    def __init__(self, num_partitions: Optional[int] = None, chunk_size: int = 10000,
+                 queue_size: int = 4, mp_context: Optional[str] = None):
+        self.num_partitions = num_partitions or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        context = multiprocessing.get_context(mp_context)
+        self._outbox = context.Queue()
+        self._inboxes = [context.Queue(queue_size) for _ in range(self.num_partitions)]
+        self._workers = [
+            context.Process(target=_partition_worker, args=(inbox, self._outbox, index), daemon=True)
+            for index, inbox in enumerate(self._inboxes)
+        ]
+        self._buffers = [([], array('d')) for _ in range(self.num_partitions)]
+        for worker in self._workers:
+            worker.start()
+    
+    def partition_of(self, name: str) -> int:
+        """
+        Partition index for a name. CRC-32 rather than hash(), which is
+        randomized per process, so every process and node routes a name alike.
+        """
+        return zlib.crc32(name.encode('utf-8')) % self.num_partitions
+    
+    def add(self, records: Union[List[DataRecord], RecordBatch]) -> None:
+        """Route a batch of transformed records to their partitions"""
+        if isinstance(records, RecordBatch):
+            names, values = records.names, records.values
+            if records.is_numpy:
+                names, values = names.tolist(), values.tolist()
+        else:
+            names = [record.name for record in records]
+            values = [record.value for record in records]
+        
+        buffers, partition_of = self._buffers, self.partition_of
+        for name, value in zip(names, values):
+            buffer = buffers[partition_of(name)]
+            buffer[0].append(name)
+            buffer[1].append(value)
+        
+        for index, buffer in enumerate(buffers):
+            if len(buffer[0]) >= self.chunk_size:
+                self._send(index)
+    
+    def _send(self, index: int, chunk: Optional[tuple] = ()) -> None:
+        """Send the buffered chunk (or a given item) to one worker without deadlocking on a dead one"""
+        if chunk == ():
+            chunk = self._buffers[index]
+            self._buffers[index] = ([], array('d'))
+        while True:
+            try:
+                self._inboxes[index].put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                if not self._workers[index].is_alive():
+                    raise RuntimeError(f"Aggregation worker {index} exited unexpectedly")
+    
+    def result(self) -> Dict[str, AggregateState]:
+        """Flush, stop the workers and combine their partitions"""
+        for index in range(self.num_partitions):
+            if self._buffers[index][0]:
+                self._send(index)
+            self._send(index, None)
+        
+        partitions: Dict[int, Dict[str, AggregateState]] = {}
+        while len(partitions) < self.num_partitions:
+            try:
+                index, states, error = self._outbox.get(timeout=0.5)
+            except queue.Empty:
+                if any(not worker.is_alive() and i not in partitions
+                       for i, worker in enumerate(self._workers)):
+                    raise RuntimeError("An aggregation worker exited without a result")
+                continue
+            if error is not None:
+                raise RuntimeError(f"Aggregation worker {index} failed:\n{error}")
+            partitions[index] = states
+        
+        self.close()
+        combined: Dict[str, AggregateState] = {}
+        for index in range(self.num_partitions):
+            combined.update(partitions[index])  # partitions hold disjoint names
+        return combined
+    
+    def close(self) -> None:
+        """Stop any workers that are still running"""
+        for worker in self._workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+    
+    def __enter__(self) -> "PartitionedAggregator":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def transform_batch(records: List[Dict], factor: float = 1.1) -> List[DataRecord]:
+    """
+    Turn 7: Transform one batch of validated records, dropping failures.
+    Defined at module level so it can be pickled into worker processes.
+    """
+    transformed_records = []
+    for record in records:
+        transformed = DataTransformer.transform_record(record, factor)
+        if transformed:
+            transformed_records.append(transformed)
+    return transformed_records
+
+
+class FusedStages:
+    """
+    Turn 21: validate, transform, filter and optionally aggregate in one
+    pass over a batch. For DataTransformer (the records engine) the
+    validator's checks, a call to transform_record, the threshold test and
+    the state update are generated into a single loop, so no intermediate valid or
+    transformed lists are built. Other engines run their batch operations
+    back to back. run() returns (filtered, invalid, valid_count, transformed_count).
+    """
+    
+    def __init__(self, validator: CompiledValidator, transformer: type = DataTransformer,
+                 transform: Callable = transform_batch, min_value: float = 100,
+                 value_factor: float = 1.1, aggregate: bool = True):
+        self.validator = validator
+        self.transformer = transformer
+        self.transform = transform
+        self.min_value = min_value
+        self.value_factor = value_factor
+        self.aggregate = aggregate
+        self.per_record = transformer is DataTransformer
+        if self.per_record:
+            self.source, namespace = self._generate()
+            exec(compile(self.source, "<FusedStages>", 'exec'), namespace)
+            self._run = namespace['run']
+    
+    def __reduce__(self):
+        """Pickle by configuration so run() can be sent to worker processes"""
+        return self.__class__, (self.validator, self.transformer, self.transform,
+                                self.min_value, self.value_factor, self.aggregate)
+    
+    def run(self, records: List[Dict],
+            states: Optional[Dict[str, AggregateState]] = None) -> tuple[Any, List[Dict], int, int]:
+        """Run the fused stages over one batch of raw records, aggregating into states"""
+        if self.per_record:
+            return self._run(records, states)
+        
+        valid_records, invalid_records = self.validator.validate_batch(records)
+        transformed = self.transform(valid_records, factor=self.value_factor)
+        filtered = self.transformer.filter_by_value(transformed, self.min_value)
+        if self.aggregate and states is not None:
+            self.transformer.aggregate_states(filtered, states)
+        return filtered, invalid_records, len(valid_records), len(transformed)
+    
+    def _generate(self) -> tuple[str, Dict]:
+        """Emit run() for the records engine"""
+        body, namespace = CompiledValidator.check_lines(self.validator.rules)
+        namespace.update(transform_record=self.transformer.transform_record, AggregateState=AggregateState,
+                         factor=self.value_factor, min_value=self.min_value)
+        lines = ["def run(records, states):",
+                 "    filtered = []",
+                 "    invalid = []",
+                 "    add_filtered = filtered.append",
+                 "    add_invalid = invalid.append",
+                 "    valid_count = 0",
+                 "    transformed_count = 0",
+                 "    for record in records:"]
+        lines += CompiledValidator.render(body, "        ", lambda message: [
+            f"add_invalid({{'record': record, 'error': {message}}})", "continue"])
+        lines += ["        valid_count += 1",
+                  "        transformed = transform_record(record, factor)",
+                  "        if transformed is None:",
+                  "            continue",
+                  "        transformed_count += 1",
+                  "        if transformed.value >= min_value:",
+                  "            add_filtered(transformed)"]
+        if self.aggregate:
+            lines += ["            if states is not None:",
+                      "                state = states.get(transformed.name)",
+                      "                if state is None:",
+                      "                    state = states[transformed.name] = AggregateState()",
+                      "                state.update(transformed.value)"]
+        lines += ["    return filtered, invalid, valid_count, transformed_count", ""]
+        return "\n".join(lines), namespace
+
+
+@dataclass
+class StagePlan:
+    """
+    Turn 21: How DataPipeline.process() runs its stages, from plan().
+    Stages in one group share a single pass; per_record means the first
+    group is one generated loop over records rather than batch operations.
+    """
+    groups: List[tuple[str, ...]]
+    fused: bool = True
+    per_record: bool = False
+    
+    def stage_name(self, group: tuple[str, ...]) -> str:
+        """Key used for the group in stage_timings, e.g. 'validate+transform+filter'"""
+        return '+'.join(group)
+    
+    def __str__(self) -> str:
+        unit = 'record' if self.per_record else 'batch'
+        passes = ' -> '.join(f"[{self.stage_name(group)}]" for group in self.groups)
+        return f"{passes} (one pass per {unit})" if self.fused else passes
+
+
+def ordered_map(executor: Executor, func: Callable, items: Iterable,
+                max_in_flight: int) -> Iterator:
+    """
+    Turn 7: Like executor.map, but submits lazily and keeps at most
+    max_in_flight tasks pending. Results are yielded in input order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_batches(records: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """Turn 6: Yield successive lists of at most batch_size items from any iterable"""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class BatchSizeTuner:
+    """
+    Turn 24: Picks the batch size from measured throughput.
+    batches() cuts the input; the pipeline calls observe() once per finished
+    batch, in the order the batches were cut. While tuning, batches alternate
+    between the best size so far and a candidate, so both are timed under the
+    same machine load. Once each has at least `samples` full-size batches and
+    `window` seconds, the candidate replaces the best size if its rows/sec are
+    higher by more than `tolerance`. The tuner hill-climbs: it keeps
+    multiplying the size by `step` while that wins, then turns around with a
+    smaller step and stops once the step falls below 10%. Sizes stay within
+    [min_size, max_size].
+    memory_limit (bytes) caps the size by the measured memory per input row:
+    every MEMORY_SAMPLE_EVERY-th batch is traced with tracemalloc from its cut
+    to its observe(), and the peak allocation over that span, divided by its
+    rows, is the new bytes_per_row. Traced batches are not timed. Only this
+    process is traced, so work done in worker processes is not counted.
+    A converged tuner keeps its size for later runs.
+    """
+    
+    MEMORY_SAMPLE_EVERY = 16
+    
+    def __init__(self, initial: int = 10, min_size: int = 1, max_size: int = 100000,
+                 memory_limit: Optional[int] = None, samples: int = 10, window: float = 0.25,
+                 tolerance: float = 0.15, step: float = 2.0):
+        if not 1 <= min_size <= max_size:
+            raise ValueError("Batch size bounds must satisfy 1 <= min_size <= max_size")
+        if samples < 1:
+            raise ValueError("samples must be at least 1")
+        if step <= 1.1:
+            raise ValueError("step must be greater than 1.1")
+        self.initial = min(max(initial, min_size), max_size)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.memory_limit = memory_limit
+        self.samples = samples
+        self.window = window
+        self.tolerance = tolerance
+        self.size = self.initial
+        self.converged = False
+        self.bytes_per_row = 0
+        self.history: List[Dict] = []
+        self.step = step
+        self._step = step
+        self._direction = 1
+        self._candidate = self._clamp(round(self.initial * step))
+        self._stats: Dict[int, List] = {}  # size -> [rows, seconds, batches] since the last decision
+        self._cut_sizes: deque = deque()  # size of each batch cut but not yet observed
+        self._cuts = 0
+        self._trace: Optional[tuple] = None  # (cut index, baseline bytes, started tracing)
+        self._last: Optional[float] = None
+        if self._candidate == self.size:
+            self.converged = True
+    
+    def config(self) -> Dict:
+        """Constructor settings (not the tuning state), e.g. for cache keys"""
+        return {
+            'initial': self.initial, 'min_size': self.min_size, 'max_size': self.max_size,
+            'memory_limit': self.memory_limit, 'samples': self.samples, 'window': self.window,
+            'tolerance': self.tolerance, 'step': self.step
+        }
+    
+    def _clamp(self, size: int) -> int:
+        upper = self.max_size
+        if self.memory_limit is not None and self.bytes_per_row:
+            upper = min(upper, self.memory_limit // self.bytes_per_row)
+        return min(max(size, self.min_size), max(upper, self.min_size))
+    
+    def _next_size(self) -> int:
+        """Size of the next batch: the best size, alternating with the candidate while tuning"""
+        if self._clamp(self.size) < self.size:
+            logger.info(f"Batch size lowered from {self.size} to {self._clamp(self.size)} by the memory limit")
+            self.size = self._clamp(self.size)
+            self._candidate = self._clamp(self._candidate)
+            self._stats = {}
+        if self.converged or self._candidate == self.size or self._cuts % 2 == 0:
+            return self.size
+        return self._candidate
+    
+    def batches(self, records: Iterable[Dict]) -> Iterator[List[Dict]]:
+        """Like iter_batches(), with the size as tuned so far at each cut"""
+        iterator = iter(records)
+        self._last = time.perf_counter()
+        try:
+            while True:
+                size = self._next_size()
+                if (self.memory_limit is not None and self._trace is None
+                        and self._cuts % self.MEMORY_SAMPLE_EVERY == 0):
+                    started = not tracemalloc.is_tracing()
+                    if started:
+                        tracemalloc.start()
+                    else:
+                        tracemalloc.reset_peak()
+                    self._trace = (self._cuts, tracemalloc.get_traced_memory()[0], started)
+                batch = list(islice(iterator, size))
+                if not batch:
+                    return
+                self._cut_sizes.append(size)
+                self._cuts += 1
+                yield batch
+        finally:
+            self._cut_sizes.clear()
+            self._stop_trace()
+    
+    def _stop_trace(self) -> Optional[int]:
+        """End a pending memory trace; returns its peak bytes above the baseline"""
+        if self._trace is None:
+            return None
+        _, baseline, started = self._trace
+        self._trace = None
+        if not tracemalloc.is_tracing():
+            return None
+        peak = tracemalloc.get_traced_memory()[1]
+        if started:
+            tracemalloc.stop()
+        return max(peak - baseline, 0)
+    
+    def observe(self, rows: int) -> None:
+        """Record that a batch of rows input rows has been fully processed"""
+        now = time.perf_counter()
+        elapsed = now - (self._last if self._last is not None else now)
+        self._last = now
+        if not self._cut_sizes:
+            return
+        index = self._cuts - len(self._cut_sizes)
+        size = self._cut_sizes.popleft()
+        if self._trace is not None and self._trace[0] == index:
+            traced_bytes = self._stop_trace()
+            if traced_bytes is not None and rows:
+                self.bytes_per_row = -(-traced_bytes // rows)
+            return
+        # Partial batches, and sizes no longer being compared, say nothing
+        if self.converged or rows != size or size not in (self.size, self._candidate):
+            return
+        stats = self._stats.setdefault(size, [0, 0.0, 0])
+        stats[0] += rows
+        stats[1] += elapsed
+        stats[2] += 1
+        if all(self._measured(self._stats.get(trial)) for trial in (self.size, self._candidate)):
+            self._adjust()
+    
+    def _measured(self, stats: Optional[List]) -> bool:
+        return stats is not None and stats[2] >= self.samples and stats[1] >= self.window / 2
+    
+    def _adjust(self) -> None:
+        """Compare the candidate with the best size, then pick the next candidate or settle"""
+        best_rows, best_seconds, _ = self._stats[self.size]
+        rows, seconds, _ = self._stats[self._candidate]
+        best_throughput = best_rows / best_seconds if best_seconds > 0 else math.inf
+        throughput = rows / seconds if seconds > 0 else math.inf
+        self._stats = {}
+        self.history.append({'size': self.size, 'rows_per_sec': best_throughput,
+                             'candidate': self._candidate, 'candidate_rows_per_sec': throughput})
+        if throughput > best_throughput * (1 + self.tolerance):
+            self.size, best_throughput = self._candidate, throughput
+        else:
+            # No clear gain over the best size: turn around with a smaller step
+            self._direction = -self._direction
+            self._step = math.sqrt(self._step)
+        
+        candidate = self._clamp(round(self.size * self._step ** self._direction))
+        if self._step < 1.1 or candidate == self.size:
+            self.converged = True
+            logger.info(f"Batch size converged at {self.size} rows ({best_throughput:,.0f} rows/sec); "
+                        f"pass batch_size={self.size} to pin it")
+        else:
+            self._candidate = candidate
+    
+    def summary(self) -> Dict:
+        return {
+            'initial': self.initial,
+            'size': self.size,
+            'converged': self.converged,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'memory_limit': self.memory_limit,
+            'bytes_per_row': self.bytes_per_row,
+            'history': list(self.history)
+        }
+
+
+class DataReader:
+    """
+    Turn 14: Chunked readers for NDJSON and CSV exports, plain or gzip.
+    Files are parsed in large line-aligned chunks and yielded as batches of
+    dicts, so a multi-GB export never has to be loaded before processing.
+    """
+    
+    FORMATS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson', '.csv': 'csv'}
+    DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+    
+    @staticmethod
+    def is_compressed(path: Union[str, os.PathLike]) -> bool:
+        """True if the file suffix marks it as gzip-compressed"""
+        return Path(path).suffix.lower() == '.gz'
+    
+    @staticmethod
+    def detect_format(path: Union[str, os.PathLike]) -> tuple[str, bool]:
+        """Return (format, is_gzip) from the file suffix, e.g. 'data.ndjson.gz'"""
+        suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+        compressed = DataReader.is_compressed(path)
+        if compressed:
+            suffixes = suffixes[:-1]
+        file_format = DataReader.FORMATS.get(suffixes[-1] if suffixes else '')
+        if file_format is None:
+            raise ValueError(f"Cannot detect format of {path}; "
+                             f"expected one of {sorted(DataReader.FORMATS)} (optionally .gz)")
+        return file_format, compressed
+    
+    @staticmethod
+    def iter_chunks(path: Union[str, os.PathLike], chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                    compressed: bool = False, use_mmap: bool = False) -> Iterator[bytes]:
+        """Yield byte chunks of roughly chunk_bytes that always end on a line boundary"""
+        if use_mmap and not compressed:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    start = 0
+                    while start < size:
+                        end = min(start + chunk_bytes, size)
+                        if end < size:
+                            newline = mapped.find(b'\n', end - 1)
+                            end = size if newline == -1 else newline + 1
+                        yield mapped[start:end]
+                        start = end
+            return
+        
+        opener = gzip.open if compressed else open
+        with opener(path, 'rb') as f:
+            remainder = b''
+            while block := f.read(chunk_bytes):
+                block = remainder + block
+                cut = block.rfind(b'\n') + 1
+                remainder = block[cut:]
+                if cut:
+                    yield block[:cut]
+            if remainder:
+                yield remainder
+    
+    @staticmethod
+    def read_ndjson(path: Union[str, os.PathLike], chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                    compressed: Optional[bool] = None, use_mmap: bool = False) -> Iterator[List[Dict]]:
+        """
+        Yield one batch of dicts per chunk. Each chunk is parsed with a single
+        json.loads call; if that fails, the chunk is re-parsed line by line
+        and malformed or non-object lines are logged and skipped.
+        """
+        if compressed is None:
+            compressed = DataReader.is_compressed(path)
+        
+        line_offset = 0
+        for chunk in DataReader.iter_chunks(path, chunk_bytes, compressed, use_mmap):
+            lines = [line for line in chunk.split(b'\n') if line.strip()]
+            try:
+                records = json.loads(b'[' + b','.join(lines) + b']')
+                # A line such as '{...},{...}' parses as two records; only the
+                # line-by-line path can tell it is malformed
+                if len(records) != len(lines) or not all(isinstance(record, dict) for record in records):
+                    raise ValueError("line does not hold exactly one object")
+            except ValueError:
+                records = DataReader._parse_lines(chunk, line_offset)
+            
+            line_offset += chunk.count(b'\n')
+            if records:
+                yield records
+    
+    @staticmethod
+    def _parse_lines(chunk: bytes, line_offset: int) -> List[Dict]:
+        """Slow path: parse a chunk line by line, skipping bad lines"""
+        records = []
+        for number, line in enumerate(chunk.split(b'\n'), line_offset + 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning(f"Skipping malformed NDJSON line {number}: {e}")
+                continue
+            if not isinstance(record, dict):
+                logger.warning(f"Skipping NDJSON line {number}: expected an object")
+                continue
+            records.append(record)
+        return records
+    
+    @staticmethod
+    def read_csv(path: Union[str, os.PathLike], batch_size: int = 10000,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES, compressed: Optional[bool] = None,
+                 **csv_options) -> Iterator[List[Dict]]:
+        """
+        Yield batches of batch_size row dicts through csv.DictReader over a
+        large read buffer. Quoted fields may contain newlines, so CSV is not
+        split into independent chunks (and has no mmap mode).
+        """
+        if compressed is None:
+            compressed = DataReader.is_compressed(path)
+        
+        if compressed:
+            stream = io.TextIOWrapper(io.BufferedReader(gzip.open(path, 'rb'), chunk_bytes),
+                                      encoding='utf-8', newline='')
+        else:
+            stream = open(path, 'r', encoding='utf-8', newline='', buffering=chunk_bytes)
+        with stream:
+            yield from iter_batches(csv.DictReader(stream, **csv_options), batch_size)
+    
+    @staticmethod
+    def read_batches(path: Union[str, os.PathLike], file_format: Optional[str] = None,
+                     batch_size: int = 10000, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                     use_mmap: bool = False) -> Iterator[List[Dict]]:
+        """
+        Dispatch to the NDJSON or CSV reader based on file_format or, when it
+        is None, the file suffix. A trailing .gz always means gzip.
+        """
+        compressed = DataReader.is_compressed(path)
+        if file_format is None:
+            file_format, _ = DataReader.detect_format(path)
+        if file_format == 'ndjson':
+            return DataReader.read_ndjson(path, chunk_bytes, compressed, use_mmap)
+        if file_format == 'csv':
+            if use_mmap:
+                logger.info("use_mmap only applies to uncompressed NDJSON; reading CSV buffered")
+            return DataReader.read_csv(path, batch_size, chunk_bytes, compressed)
+        raise ValueError(f"Unknown file format: {file_format}")
+
+
+class DeadLetterSink:
+    """
+    Turn 16: Collects invalid records instead of logging each one.
+    Records are buffered and written in bulk, counted per error code, and
+    only the first sample_size are logged. Subclasses implement _write().
+    """
+    
+    def __init__(self, path: Union[str, os.PathLike], buffer_size: int = 10000, sample_size: int = 5):
+        self.path = os.fspath(path)
+        self.buffer_size = buffer_size
+        self.sample_size = sample_size
+        self.counts: Dict[str, int] = {}
+        self.total = 0
+        self._buffer: List[tuple[str, str, Dict]] = []
+    
+    def add(self, record: Dict, error: str) -> None:
+        """Buffer one invalid record"""
+        code = CompiledValidator.error_code(error)
+        self.counts[code] = self.counts.get(code, 0) + 1
+        self.total += 1
+        if self.total <= self.sample_size:
+            logger.warning(f"  Record {record.get('id')}: {error}")
+            if self.total == self.sample_size:
+                logger.warning(f"Further invalid records go to {self.path} without logging")
+        
+        self._buffer.append((code, error, record))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+    
+    def add_many(self, invalid_records: List[Dict]) -> None:
+        """Buffer {'record', 'error'} items as returned by validate_batch"""
+        for item in invalid_records:
+            self.add(item['record'], item['error'])
+    
+    def flush(self) -> None:
+        """Write all buffered records in one bulk operation"""
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+    
+    def close(self) -> None:
+        self.flush()
+    
+    def summary(self) -> Dict:
+        """Counters and location for the pipeline result"""
+        return {'location': self.path, 'count': self.total, 'counts': dict(self.counts)}
+    
+    def _write(self, items: List[tuple[str, str, Dict]]) -> None:
+        raise NotImplementedError
+    
+    def __enter__(self) -> "DeadLetterSink":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class NDJSONDeadLetterSink(DeadLetterSink):
+    """Turn 16: Appends invalid records to an NDJSON file, one object per line"""
+    
+    def _write(self, items: List[tuple[str, str, Dict]]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(
+                json.dumps({'error_code': code, 'error': error, 'record': record}, default=str) + '\n'
+                for code, error, record in items
+            )
+
+
+class SQLiteDeadLetterSink(DeadLetterSink):
+    """Turn 16: Inserts invalid records into a SQLite table with executemany"""
+    
+    def __init__(self, path: Union[str, os.PathLike], table: str = 'dead_letters', **kwargs):
+        super().__init__(path, **kwargs)
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.table = table
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, error_code TEXT NOT NULL, "
+            "error TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._connection.commit()
+    
+    def _write(self, items: List[tuple[str, str, Dict]]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT INTO {self.table} (error_code, error, record) VALUES (?, ?, ?)",
+                [(code, error, json.dumps(record, default=str)) for code, error, record in items]
+            )
+    
+    def close(self) -> None:
+        super().close()
+        self._connection.close()
+
+
+class OutputWriter:
+    """
+    Turn 19: Streams filtered records to a file as each batch is produced,
+    instead of collecting them as dicts in the pipeline result.
+    Subclasses implement _write_columns() and may override _open_stream()
+    and _write_header().
+    Turn 20: position() flushes the file and returns its row count and byte
+    offset. A writer opened with resume=<a position> truncates the file back
+    to that offset and appends, so rows written after the last checkpoint
+    are dropped and the rows before it are kept.
+    """
+    
+    FORMAT = None
+    
+    def __init__(self, path: Union[str, os.PathLike], resume: Optional[Dict] = None):
+        self.path = os.fspath(path)
+        self.compressed = DataReader.is_compressed(self.path)
+        self.count = 0
+        if resume is None:
+            self._raw = open(self.path, 'wb')
+        else:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < resume['offset']:
+                raise ValueError(f"Output {self.path} is shorter than its checkpoint says; "
+                                 f"remove the checkpoint to start over")
+            self._raw = open(self.path, 'r+b')
+            self._raw.truncate(resume['offset'])
+            self._raw.seek(resume['offset'])
+            self.count = resume['count']
+        self._file = self._open_stream()
+        if resume is None:
+            self._write_header()
+    
+    @staticmethod
+    def for_path(path: Union[str, os.PathLike], resume: Optional[Dict] = None) -> "OutputWriter":
+        """Pick a writer from the file suffix: .ndjson/.jsonl or .csv (optionally .gz), or .cols"""
+        suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+        if suffixes and suffixes[-1] == ColumnarOutputWriter.SUFFIX:
+            return ColumnarOutputWriter(path, resume)
+        file_format, _ = DataReader.detect_format(path)
+        writer = CSVOutputWriter if file_format == 'csv' else NDJSONOutputWriter
+        return writer(path, resume)
+    
+    @staticmethod
+    def columns(records: Union[List[DataRecord], RecordBatch]) -> tuple[list, list, list, list]:
+        """(ids, names, values, timestamps) of a batch, without building DataRecords for a RecordBatch"""
+        if isinstance(records, RecordBatch):
+            ids, names, values = records.ids, records.names, records.values
+            if records.is_numpy:
+                ids, names, values = ids.tolist(), names.tolist(), values.tolist()
+            return ids, names, values, [records.timestamp] * len(records)
+        return ([record.id for record in records], [record.name for record in records],
+                [record.value for record in records], [record.timestamp for record in records])
+    
+    def write_batch(self, records: Union[List[DataRecord], RecordBatch]) -> None:
+        """Append one batch of transformed records"""
+        if len(records):
+            self._write_columns(*self.columns(records))
+            self.count += len(records)
+    
+    def flush(self) -> None:
+        self._file.flush()
+        self._raw.flush()
+    
+    def position(self) -> Dict:
+        """Turn 20: Row count and byte offset of everything written so far, synced to disk"""
+        self._file.flush()
+        if self.compressed:
+            # End the gzip member, so the file is complete up to this offset
+            self._file.detach().close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        offset = self._raw.tell()
+        if self.compressed:
+            self._file = self._open_stream()
+        return {'path': os.path.abspath(self.path), 'count': self.count, 'offset': offset}
+    
+    def close(self) -> None:
+        self._file.close()
+        self._raw.close()
+    
+    def summary(self) -> Dict:
+        """Location and row count for the pipeline result"""
+        return {'path': self.path, 'format': self.FORMAT, 'count': self.count}
+    
+    def _open_stream(self) -> Any:
+        """The stream _write_columns() writes to, on top of the binary file"""
+        return self._raw
+    
+    def _text_stream(self, newline: Optional[str] = None) -> io.TextIOWrapper:
+        """UTF-8 text over the binary file, through a new gzip member for a .gz path"""
+        binary = gzip.GzipFile(fileobj=self._raw, mode='wb') if self.compressed else self._raw
+        return io.TextIOWrapper(binary, encoding='utf-8', newline=newline)
+    
+    def _write_header(self) -> None:
+        """Write what starts a new file (nothing by default)"""
+    
+    def _write_columns(self, ids: list, names: list, values: list, timestamps: list) -> None:
+        raise NotImplementedError
+    
+    def __enter__(self) -> "OutputWriter":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class NDJSONOutputWriter(OutputWriter):
+    """Turn 19: One JSON object per record and line; gzip-compressed for a .gz path"""
     
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now().isoformat()
+    FORMAT = 'ndjson'
+    
+    def _open_stream(self) -> io.TextIOWrapper:
+        return self._text_stream()
+    
+    def _write_columns(self, ids: list, names: list, values: list, timestamps: list) -> None:
+        dumps = json.dumps
+        self._file.writelines(
+            dumps({'id': record_id, 'name': name, 'value': value, 'timestamp': timestamp}) + '\n'
+            for record_id, name, value, timestamp in zip(ids, names, values, timestamps)
+        )
 
 
-class DataValidator:
-    """Turn 3: Added validation before processing"""
+class CSVOutputWriter(OutputWriter):
+    """Turn 19: CSV with an id,name,value,timestamp header; gzip-compressed for a .gz path"""
+    
+    FORMAT = 'csv'
+    FIELDS = ('id', 'name', 'value', 'timestamp')
+    
+    def _open_stream(self) -> io.TextIOWrapper:
+        return self._text_stream(newline='')
+    
+    def _write_header(self) -> None:
+        csv.writer(self._file).writerow(self.FIELDS)
+    
+    def _write_columns(self, ids: list, names: list, values: list, timestamps: list) -> None:
+        csv.writer(self._file).writerows(zip(ids, names, values, timestamps))
+
+
+class ColumnarOutputWriter(OutputWriter):
+    """
+    Turn 19: Compact binary columnar file, one block per batch.
+    Each block holds little-endian int64 ids and float64 values, plus names
+    and timestamps as uint32 codes into a per-block JSON string dictionary,
+    so repeated names and the shared batch timestamp are stored once.
+    Ids outside the int64 range are rejected with a ValueError before their
+    block is written; use NDJSON or CSV output for them.
+    Read it back with ColumnarOutputWriter.read().
+    """
+    
+    FORMAT = 'columnar'
+    SUFFIX = '.cols'
+    MAGIC = b'WFCOLS01'
+    BLOCK_HEADER = struct.Struct('<II')  # rows, dictionary bytes
+    
+    def _write_header(self) -> None:
+        self._file.write(self.MAGIC)
     
     @staticmethod
-    def validate_record(record: Dict) -> tuple[bool, str]:
-        """
-        Validate a single record before processing.
-        Returns (is_valid, error_message)
-        """
-        if not record.get('id'):
-            return False, "Missing required field: id"
-        if not record.get('name'):
-            return False, "Missing required field: name"
-        if 'value' not in record:
-            return False, "Missing required field: value"
-        
+    def _little_endian(column: array) -> bytes:
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column.tobytes()
+    
+    def _write_columns(self, ids: list, names: list, values: list, timestamps: list) -> None:
         try:
-            float(record['value'])
-        except (ValueError, TypeError):
-            return False, f"Invalid value type: {record['value']}"
+            id_column = array('q', ids)
+        except OverflowError:
+            too_large = next(record_id for record_id in ids if not -2**63 <= record_id < 2**63)
+            raise ValueError(f"Record id {too_large} does not fit the int64 id column of {self.path}; "
+                             f"write NDJSON or CSV output instead") from None
+        codes: Dict[str, int] = {}
+        name_codes = array('I', [codes.setdefault(name, len(codes)) for name in names])
+        timestamp_codes = array('I', [codes.setdefault(timestamp, len(codes)) for timestamp in timestamps])
+        dictionary = json.dumps(list(codes)).encode('utf-8')
+        
+        self._file.write(self.BLOCK_HEADER.pack(len(ids), len(dictionary)))
+        self._file.write(self._little_endian(id_column))
+        self._file.write(self._little_endian(array('d', values)))
+        self._file.write(self._little_endian(name_codes))
+        self._file.write(self._little_endian(timestamp_codes))
+        self._file.write(dictionary)
+    
+    @classmethod
+    def read(cls, path: Union[str, os.PathLike]) -> Iterator[List[Dict]]:
+        """Yield each block back as a list of record dicts"""
+        with open(path, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"{path} is not a columnar pipeline output file")
+            while header := f.read(cls.BLOCK_HEADER.size):
+                rows, dictionary_bytes = cls.BLOCK_HEADER.unpack(header)
+                columns = []
+                for typecode in ('q', 'd', 'I', 'I'):
+                    column = array(typecode)
+                    column.frombytes(f.read(rows * column.itemsize))
+                    if sys.byteorder == 'big':
+                        column.byteswap()
+                    columns.append(column)
+                ids, values, name_codes, timestamp_codes = columns
+                strings = json.loads(f.read(dictionary_bytes))
+                yield [
+                    {'id': record_id, 'name': strings[name], 'value': value, 'timestamp': strings[timestamp]}
+                    for record_id, value, name, timestamp in zip(ids, values, name_codes, timestamp_codes)
+                ]
+
+
+class Checkpoint:
+    """
+    Turn 20: Aggregate states, running counters, a high-water mark and the
+    output file position they cover, persisted to a JSON file. Every save writes a temporary file next to
+    the checkpoint and renames it over the old one, so a crash leaves either
+    the previous or the new checkpoint on disk, never a partial one.
+    """
+    
+    VERSION = 1
+    COUNTERS = ('input_count', 'valid_count', 'invalid_count', 'transformed_count', 'filtered_count')
+    
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        self.load()
+    
+    def load(self) -> None:
+        """(Re)load the last saved checkpoint, or start empty if there is none"""
+        self.watermark: Any = None
+        self.states: Dict[str, AggregateState] = {}
+        self.counts: Dict[str, int] = dict.fromkeys(self.COUNTERS, 0)
+        self.output: Optional[Dict] = None  # OutputWriter.position() at the last commit
+        if not os.path.exists(self.path):
+            return
         
-        return True, ""
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != self.VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {self.path}: {data.get('version')}")
+        self.watermark = data['watermark']
+        self.states = {name: AggregateState.from_dict(state) for name, state in data['states'].items()}
+        self.counts.update(data['counts'])
+        self.output = data.get('output')
+    
+    def save(self) -> None:
+        """Atomically replace the checkpoint file with the current state"""
+        data = {
+            'version': self.VERSION,
+            'updated_at': datetime.now().isoformat(),
+            'watermark': self.watermark,
+            'counts': self.counts,
+            'output': self.output,
+            'states': {name: state.to_dict() for name, state in self.states.items()}
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.checkpoint-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    def is_new(self, key: Any) -> bool:
+        """True if a record with this watermark key has not been checkpointed yet"""
+        return self.watermark is None or key > self.watermark
+    
+    def commit(self, watermark: Any, counts: Dict[str, int]) -> None:
+        """Record one finished batch: raise the watermark and add its counters"""
+        if watermark is not None and self.is_new(watermark):
+            self.watermark = watermark
+        for counter, value in counts.items():
+            self.counts[counter] += value
+    
+    def summary(self) -> Dict:
+        return {'path': self.path, 'watermark': self.watermark, 'totals': dict(self.counts)}
+
+
+class RecordStore:
+    """
+    Turn 22: Append-only list of transformed batches with a memory budget.
+    Batches stay in memory until memory_budget bytes are in use; later ones
+    are packed into a temporary file of fixed-width rows (int64 id, uint32
+    interned name id, float64 value, int64 timestamp in microseconds) that
+    is memory-mapped for reading. Iteration yields batches in append order
+    and of the kind appended. With NumPy, spilled RecordBatch columns are
+    views straight into the mapping, so filtering and aggregation read them
+    without copying.
+    """
+    
+    RECORD = struct.Struct('<qIdq')
+    EPOCH = datetime(1970, 1, 1)
+    
+    def __init__(self, memory_budget: int, directory: Optional[Union[str, os.PathLike]] = None):
+        if memory_budget < 0:
+            raise ValueError("memory_budget must not be negative")
+        self.memory_budget = memory_budget
+        self.directory = directory
+        self.memory_bytes = 0
+        self.row_count = 0
+        self.spilled_batches = 0
+        self.spilled_rows = 0
+        self._entries: List[tuple] = []  # (batch,) in memory or (kind, offset, rows) on disk
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._file = None
+        self._size = 0
+        self._mapping: Optional[mmap.mmap] = None
+        self._name_table = None
     
     @staticmethod
-    def validate_batch(records: List[Dict]) -> tuple[List[Dict], List[Dict]]:
-        """
-        Validate batch of records.
-        Returns (valid_records, invalid_records)
-        """
-        valid = []
-        invalid = []
+    def estimate_bytes(batch: Union[List[DataRecord], RecordBatch]) -> int:
+        """Rough in-memory size of a batch, from its columns or its first record"""
+        if isinstance(batch, RecordBatch):
+            if batch.is_numpy:
+                return batch.ids.nbytes + batch.values.nbytes + batch.names.nbytes
+            item_sizes = sum(getattr(column, 'itemsize', 8) for column in (batch.ids, batch.values))
+            return len(batch) * (item_sizes + 8)
+        if not batch:
+            return 0
+        first = batch[0]
+        per_record = (sys.getsizeof(first) + sys.getsizeof(first.__dict__) + sys.getsizeof(first.id)
+                      + sys.getsizeof(first.name) + sys.getsizeof(first.value)
+                      + sys.getsizeof(first.timestamp) + 8)
+        return len(batch) * per_record
+    
+    def append(self, batch: Union[List[DataRecord], RecordBatch]) -> None:
+        """Keep the batch in memory if it fits the budget, otherwise spill it"""
+        size = self.estimate_bytes(batch)
+        self.row_count += len(batch)
+        if self.memory_bytes + size <= self.memory_budget or not self._spill(batch):
+            self._entries.append((batch,))
+            self.memory_bytes += size
+    
+    def _name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+            self._name_table = None
+        return name_id
+    
+    def _micros(self, timestamp: str) -> int:
+        return (datetime.fromisoformat(timestamp) - self.EPOCH) // timedelta(microseconds=1)
+    
+    def _timestamp(self, micros: int) -> str:
+        return (self.EPOCH + timedelta(microseconds=micros)).isoformat()
+    
+    def _spill(self, batch: Union[List[DataRecord], RecordBatch]) -> bool:
+        """Append the batch to the spill file; False if its ids do not fit in 64 bits"""
+        if isinstance(batch, RecordBatch):
+            kind = 'numpy' if batch.is_numpy else 'batch'
+            ids, names, values = batch.ids, batch.names, batch.values
+            if batch.is_numpy:
+                ids, names, values = ids.tolist(), names.tolist(), values.tolist()
+            micros = self._micros(batch.timestamp)
+            rows = zip(ids, names, values, [micros] * len(batch))
+        else:
+            kind = 'records'
+            rows = ((r.id, r.name, r.value, self._micros(r.timestamp)) for r in batch)
         
-        for record in records:
-            is_valid, error = DataValidator.validate_record(record)
-            if is_valid:
-                valid.append(record)
-            else:
-                invalid.append({'record': record, 'error': error})
+        pack, name_id = self.RECORD.pack, self._name_id
+        try:
+            data = b''.join(pack(record_id, name_id(name), value, micros)
+                            for record_id, name, value, micros in rows)
+        except struct.error:
+            return False
         
-        return valid, invalid
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='pipeline-spill-', dir=self.directory)
+        self._file.write(data)
+        self._entries.append((kind, self._size, len(batch)))
+        self._size += len(data)
+        self.spilled_batches += 1
+        self.spilled_rows += len(batch)
+        return True
+    
+    def _view(self) -> mmap.mmap:
+        """Map the spill file, remapping when it grew since the last read"""
+        if self._mapping is None or len(self._mapping) < self._size:
+            self._file.flush()
+            self._mapping = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+        return self._mapping
+    
+    def _read(self, kind: str, offset: int, rows: int) -> Union[List[DataRecord], RecordBatch]:
+        """Rebuild one spilled batch from the mapping"""
+        mapping = self._view()
+        if np is not None and kind == 'numpy':
+            table = np.frombuffer(mapping, dtype=self._numpy_dtype(), count=rows, offset=offset)
+            if self._name_table is None:
+                self._name_table = np.array(self._names, dtype=object)
+            timestamp = self._timestamp(int(table['timestamp'][0])) if rows else None
+            return RecordBatch(table['id'], self._name_table[table['name_id']], table['value'], timestamp)
+        
+        names = self._names
+        unpacked = self.RECORD.iter_unpack(memoryview(mapping)[offset:offset + rows * self.RECORD.size])
+        if kind == 'records':
+            return [DataRecord(record_id, names[name_id], value, self._timestamp(micros))
+                    for record_id, name_id, value, micros in unpacked]
+        ids, batch_names, values, timestamp = array('q'), [], array('d'), None
+        for record_id, name_id, value, micros in unpacked:
+            ids.append(record_id)
+            batch_names.append(names[name_id])
+            values.append(value)
+            timestamp = timestamp or self._timestamp(micros)
+        return RecordBatch(ids, batch_names, values, timestamp)
+    
+    @classmethod
+    def _numpy_dtype(cls) -> "np.dtype":
+        return np.dtype([('id', '<i8'), ('name_id', '<u4'), ('value', '<f8'), ('timestamp', '<i8')])
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __iter__(self) -> Iterator[Union[List[DataRecord], RecordBatch]]:
+        for entry in self._entries:
+            yield entry[0] if len(entry) == 1 else self._read(*entry)
+    
+    def summary(self) -> Dict:
+        """Spill counters for the pipeline result"""
+        return {
+            'memory_budget': self.memory_budget,
+            'memory_bytes': self.memory_bytes,
+            'spilled_batches': self.spilled_batches,
+            'spilled_rows': self.spilled_rows,
+            'spilled_bytes': self._size
+        }
+    
+    def close(self) -> None:
+        """Drop the in-memory batches and delete the spill file"""
+        self._entries = []
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                pass  # NumPy views still reference it; it closes when they are freed
+            self._mapping = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self) -> "RecordStore":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
-class DataTransformer:
-    """Transforms raw data into processed format"""
+class ResultCache:
+    """
+    Turn 23: Content-addressed on-disk cache of process() results.
+    Each entry is a JSON file named by the SHA-256 of the pipeline
+    configuration and the input records, so the same input under the same
+    configuration always maps to the same entry. Reads refresh an entry's
+    modification time; once the directory holds more than max_bytes, the
+    least recently used entries are deleted first.
+    """
+    
+    SUFFIX = '.json'
+    
+    def __init__(self, directory: Union[str, os.PathLike], max_bytes: int = 256 * 1024 * 1024):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
     
     @staticmethod
-    def transform_record(record: Dict) -> Optional[DataRecord]:
-        """
-        Transform raw dictionary into DataRecord.
-        Turn 2: Added error handling
-        """
+    def key(records: Iterable[Dict], config: Dict, chunk_size: int = 10000) -> str:
+        """SHA-256 of the canonical JSON of config followed by the records, hashed in chunks"""
+        digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=repr).encode('utf-8'))
+        for chunk in iter_batches(records, chunk_size):
+            digest.update(json.dumps(chunk, sort_keys=True, default=repr, separators=(',', ':')).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+    
+    def _entries(self) -> List[tuple]:
+        """(last used in ns, size, path) of every cache entry, least recently used first"""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(self.SUFFIX) and not entry.name.startswith('.'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # evicted by another process meanwhile
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return sorted(entries)
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for key and mark it as recently used, or None"""
+        path = self._path(key)
         try:
-            return DataRecord(
-                id=int(record['id']),
-                name=str(record['name']).strip().upper(),
-                value=float(record['value']) * 1.1  # 10% increase as transformation
-            )
-        except (KeyError, ValueError, TypeError) as e:
-            logger.warning(f"Failed to transform record: {record}. Error: {e}")
+            with open(path, encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
             return None
+        except ValueError:
+            logger.warning(f"Discarding unreadable cache entry {path}")
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
     
-    @staticmethod
-    def filter_by_value(records: List[DataRecord], min_value: float) -> List[DataRecord]:
-        """Filter records by minimum value threshold"""
-        return [r for r in records if r.value >= min_value]
-    
-    @staticmethod
-    def aggregate_by_name(records: List[DataRecord]) -> Dict[str, Dict]:
-        """Aggregate records by name"""
-        aggregated = {}
-        for record in records:
-            if record.name not in aggregated:
-                aggregated[record.name] = {
-                    'count': 0,
-                    'total': 0,
-                    'average': 0,
-                    'max': float('-inf'),
-                    'min': float('inf')
-                }
-            
-            agg = aggregated[record.name]
-            agg['count'] += 1
-            agg['total'] += record.value
-            agg['average'] = agg['total'] / agg['count']
-            agg['max'] = max(agg['max'], record.value)
-            agg['min'] = min(agg['min'], record.value)
+    def put(self, key: str, result: Dict) -> bool:
+        """Store result under key and evict past max_bytes; False if it was not cached"""
+        try:
+            data = json.dumps(result).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Result is not JSON serializable; not cached: {e}")
+            return False
+        if len(data) > self.max_bytes:
+            logger.info(f"Result of {len(data)} bytes exceeds the {self.max_bytes} byte cache; not cached")
+            return False
         
-        return aggregated
+        fd, temp_path = tempfile.mkstemp(prefix='.cache-', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._evict()
+        return True
+    
+    def _remove(self, path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = self._entries()
+        total = reduce(operator.add, (size for _, size, _ in entries), 0)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+    
+    def summary(self) -> Dict:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'path': self.directory,
+            'entries': len(entries),
+            'bytes': reduce(operator.add, (size for _, size, _ in entries), 0),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions
+        }
 
 
-class ProgressTracker:
-    """Turn 5: Added progress tracking"""
+class StreamingResult:
+    """
+    Turn 6: Iterator over processed records plus a final summary.
+    Records are produced one batch at a time as the caller consumes them;
+    the summary is complete once the iterator is exhausted.
+    """
     
-    def __init__(self, total: int, name: str = "Processing"):
-        self.total = total
-        self.current = 0
-        self.name = name
-        self.start_time = time.time()
+    def __init__(self, batches: Iterator[List[Dict]], summary: Dict):
+        self._batches = batches
+        self._current: Iterator[Dict] = iter(())
+        self._summary = summary
+        self.exhausted = False
     
-    def update(self, amount: int = 1):
-        """Update progress"""
-        self.current += amount
-        self._print_progress()
-    
-    def _print_progress(self):
-        """Print progress bar"""
-        percent = (self.current / self.total) * 100
-        filled = int(20 * self.current / self.total)
-        bar = '█' * filled + '░' * (20 - filled)
-        
-        elapsed = time.time() - self.start_time
-        if self.current > 0:
-            rate = self.current / elapsed
-            remaining = (self.total - self.current) / rate if rate > 0 else 0
-        else:
-            remaining = 0
-        
-        logger.info(f"{self.name} [{bar}] {percent:.1f}% ({self.current}/{self.total}) "
-                   f"Elapsed: {elapsed:.1f}s Remaining: {remaining:.1f}s")
+    def __iter__(self) -> "StreamingResult":
+        return self
+    
+    def __next__(self) -> Dict:
+        while True:
+            try:
+                return next(self._current)
+            except StopIteration:
+                pass
+            try:
+                self._current = iter(next(self._batches))
+            except StopIteration:
+                self.exhausted = True
+                raise
+    
+    @property
+    def summary(self) -> Dict:
+        """Final counters and aggregates; drains any records not yet consumed"""
+        for _ in self:
+            pass
+        return self._summary
 
 
 class DataPipeline:
@@ -167,15 +2347,323 @@ class DataPipeline:
     - Transforms data
     - Processes in batches for performance (Turn 4)
     - Tracks progress (Turn 5)
+    - Transforms batches on a process or thread pool (Turn 7)
+    - Optionally runs transform/filter/aggregate on NumPy columns (Turn 8)
+    - Can run entirely on compact RecordBatch objects (Turn 10)
+    - Throttled progress sinks and per-stage timings (Turn 11)
+    - Per-feed compiled validation schemas (Turn 12)
+    - Bulk dead-letter sink for invalid records (Turn 16)
+    - Hash-partitioned aggregation across worker processes (Turn 17)
+    - Opt-in approximate aggregates: top-K, distinct names, quantiles (Turn 18)
+    - Streaming output writers: NDJSON, CSV, binary columnar (Turn 19)
+    - Checkpointed incremental runs with a high-water mark (Turn 20)
+    - Fused single-pass stages; configurable threshold and factor (Turn 21)
+    - Spill-to-disk memory-mapped record store past a memory budget (Turn 22)
+    - Content-addressed on-disk result cache with LRU eviction (Turn 23)
+    - Batch size autotuned from measured throughput and memory (Turn 24)
     """
     
-    def __init__(self, batch_size: int = 10):
+    EXECUTORS = {'process': ProcessPoolExecutor, 'thread': ThreadPoolExecutor}
+    # Turn 10: engine name -> (transformer, per-batch transform function)
+    ENGINES = {
+        'records': (DataTransformer, transform_batch),
+        'batch': (BatchTransformer, BatchTransformer.transform_batch),
+        'columnar': (ColumnarTransformer, ColumnarTransformer.transform_batch)
+    }
+    # Turn 23: bump when a transform changes its output, so cached results are not reused
+    TRANSFORM_VERSION = 1
+    
+    def __init__(self, batch_size: int = 10,
+                 executor: Optional[Union[str, Executor]] = None,
+                 max_workers: Optional[int] = None,
+                 engine: str = 'records',
+                 progress_sinks: Optional[List[Callable[[Dict], None]]] = None,
+                 progress_interval: Optional[float] = 1.0,
+                 progress_every: Optional[int] = None,
+                 validator: Optional[CompiledValidator] = None,
+                 dead_letter: Optional[DeadLetterSink] = None,
+                 aggregate_partitions: Optional[int] = None,
+                 aggregation: str = 'exact',
+                 approximate_options: Optional[Dict[str, Any]] = None,
+                 output: Union[OutputWriter, str, os.PathLike, None] = None,
+                 checkpoint: Union[Checkpoint, str, os.PathLike, None] = None,
+                 watermark_key: Optional[Callable[[Dict], Any]] = None,
+                 checkpoint_every: int = 1,
+                 min_value: float = 100,
+                 value_factor: float = 1.1,
+                 fuse_stages: bool = False,
+                 memory_budget: Optional[int] = None,
+                 spill_dir: Optional[Union[str, os.PathLike]] = None,
+                 cache: Union[ResultCache, str, os.PathLike, None] = None,
+                 autotune: Union[BatchSizeTuner, bool] = False):
+        """
+        Turn 7: executor selects where transform batches run:
+        None (inline), 'process' for CPU-bound transforms, 'thread' for
+        I/O-bound ones, or an existing Executor owned by the caller.
+        Turn 8: engine='columnar' uses ColumnarTransformer when NumPy is installed.
+        Turn 10: engine='batch' keeps rows in array-backed RecordBatch objects;
+        it is also the fallback for 'columnar' when NumPy is missing.
+        Turn 11: progress_sinks/progress_interval/progress_every configure the
+        ProgressTracker; by default it logs at most once per second.
+        Turn 12: validator replaces the default DataValidator rules.
+        Turn 16: dead_letter receives invalid records instead of one log line each.
+        Turn 17: aggregate_partitions > 0 shards aggregation across that many processes.
+        Turn 18: aggregation='approximate' replaces exact per-name aggregates with
+        bounded-memory sketches; approximate_options go to ApproximateAggregates.
+        Turn 19: output streams filtered records to a file (an OutputWriter, or a
+        path whose suffix picks the format) and replaces result['records'].
+        Turn 20: checkpoint (a Checkpoint or a path) makes runs incremental: records
+        whose watermark_key (default: integer id) is at or below the stored
+        high-water mark, or cannot be computed (reported per run as
+        unkeyed_count), are skipped and new aggregates merge into the stored
+        ones. Input must arrive in watermark order; process_stream() saves after
+        every checkpoint_every batches, process() once per run. An output path
+        is appended to, after cutting off rows written since the last save.
+        Turn 21: min_value (filter threshold) and value_factor (transform) replace
+        the former constants. fuse_stages=True lets process() run the stages chosen
+        by plan() in a single pass per record or batch. It is off by default since
+        a fused pass reports one stage_timings entry for the stages it merges.
+        Turn 22: memory_budget (bytes, half each) caps the transformed and filtered
+        batches the staged path (fuse_stages=False) keeps in memory; batches beyond it
+        spill to a memory-mapped RecordStore file in spill_dir. The fused path
+        holds no intermediate batches, so a budget cannot be combined with
+        fuse_stages or autotune. Without an output, spilled filtered rows are
+        read back into result['records'] (with a warning); set output to keep
+        them on disk.
+        Turn 23: cache (a ResultCache or a directory) lets process() return the
+        stored result for input it has already seen under the same settings
+        (see cache_key). Runs with side effects (output, checkpoint,
+        dead_letter) cannot be cached.
+        Turn 24: autotune (True, or a BatchSizeTuner for custom bounds) starts at
+        batch_size and adjusts the input batch size of process() and
+        process_stream() from measured throughput; result['batch_size'] reports
+        the size it settled on. The tuner times one pass per batch, so process()
+        runs fused when autotune is on. The async path keeps batch_size.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if isinstance(executor, str) and executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}. "
+                             f"Expected one of {sorted(self.EXECUTORS)}")
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Expected one of {list(self.ENGINES)}")
+        if engine == 'columnar' and not ColumnarTransformer.available():
+            logger.warning("NumPy is not installed; falling back to the batch engine")
+            engine = 'batch'
+        
         self.batch_size = batch_size
+        self.executor = executor
+        self.max_workers = max_workers
+        self.engine = engine
+        self.transformer, transform = self.ENGINES[engine]
+        self._transform_batch = partial(transform, factor=value_factor)
+        self.min_value = min_value
+        self.value_factor = value_factor
+        self.fuse_stages = fuse_stages
+        if memory_budget is not None and memory_budget < 0:
+            raise ValueError("memory_budget must not be negative")
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.progress_sinks = progress_sinks
+        self.progress_interval = progress_interval
+        self.progress_every = progress_every
+        self.validator = validator or DEFAULT_VALIDATOR
+        self.dead_letter = dead_letter
+        if aggregate_partitions is not None and aggregate_partitions < 1:
+            raise ValueError("aggregate_partitions must be at least 1")
+        self.aggregate_partitions = aggregate_partitions
+        if aggregation not in ('exact', 'approximate'):
+            raise ValueError(f"Unknown aggregation: {aggregation}. Expected 'exact' or 'approximate'")
+        if aggregation == 'approximate' and aggregate_partitions:
+            raise ValueError("Approximate aggregation does not support aggregate_partitions")
+        self.aggregation = aggregation
+        self.approximate_options = approximate_options or {}
+        self.output = output
+        if checkpoint is not None and (aggregation != 'exact' or aggregate_partitions):
+            raise ValueError("Checkpointing requires exact, unpartitioned aggregation")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1")
+        self.checkpoint = checkpoint
+        self.watermark_key = watermark_key or self.record_id
+        self.checkpoint_every = checkpoint_every
+        if cache is not None and (output is not None or checkpoint is not None or dead_letter is not None):
+            raise ValueError("The result cache cannot be combined with output, checkpoint or dead_letter")
+        self.cache = cache if cache is None or isinstance(cache, ResultCache) else ResultCache(cache)
+        if autotune is True:
+            autotune = BatchSizeTuner(batch_size)
+        self.tuner = autotune or None
+        if memory_budget is not None and (fuse_stages or self.tuner is not None):
+            raise ValueError("memory_budget only applies to the staged process() path; "
+                             "it cannot be combined with fuse_stages or autotune")
         self.total_processed = 0
         self.total_errors = 0
     
-    def read_data(self, data: List[Dict]) -> List[Dict]:
-        """Read and validate input data"""
+    @contextmanager
+    def _executor_scope(self) -> Iterator[Executor]:
+        """Yield the configured executor, creating and shutting down a pool if needed"""
+        if isinstance(self.executor, Executor):
+            yield self.executor
+            return
+        
+        with self.EXECUTORS[self.executor](max_workers=self.max_workers) as pool:
+            yield pool
+    
+    def _input_batches(self, records: Iterable[Dict]) -> Iterator[List[Dict]]:
+        """Turn 24: Input batches of the tuned size, or of batch_size"""
+        if self.tuner is None:
+            return iter_batches(records, self.batch_size)
+        return self.tuner.batches(records)
+    
+    def _transform_batches(self, batches: Iterable[List[Dict]]) -> Iterator[Union[List[DataRecord], RecordBatch]]:
+        """Turn 7: Transform batches inline or on the configured pool, preserving order"""
+        if self.executor is None:
+            for batch in batches:
+                yield self._transform_batch(batch)
+            return
+        
+        max_in_flight = 2 * (self.max_workers or os.cpu_count() or 1)
+        with self._executor_scope() as pool:
+            yield from ordered_map(pool, self._transform_batch, batches, max_in_flight)
+    
+    @contextmanager
+    def _aggregation_scope(self, states: Optional[Dict[str, AggregateState]] = None) -> Iterator[tuple]:
+        """
+        Turn 17: Yield (add, result) callables that aggregate batches either
+        locally or hash-partitioned across aggregate_partitions processes.
+        result() returns the rendered 'aggregated' value.
+        Turn 18: aggregation='approximate' folds batches into bounded sketches.
+        Turn 20: exact aggregation continues from states when given.
+        """
+        if self.aggregation == 'approximate':
+            sketch = ApproximateAggregates(**self.approximate_options)
+            yield sketch.add, sketch.to_dict
+        elif self.aggregate_partitions:
+            with PartitionedAggregator(self.aggregate_partitions) as partitioned:
+                yield partitioned.add, lambda: DataTransformer.render_states(partitioned.result())
+        else:
+            states = {} if states is None else states
+            yield (lambda batch: self.transformer.aggregate_states(batch, states),
+                   lambda: DataTransformer.render_states(states))
+    
+    @staticmethod
+    def record_id(record: Dict) -> int:
+        """Turn 20: Default watermark key, the record id as an integer"""
+        return int(record['id'])
+    
+    @contextmanager
+    def _checkpoint_scope(self) -> Iterator[Optional[Checkpoint]]:
+        """
+        Turn 20: Yield the run's checkpoint, or None. If the run fails, unsaved
+        in-memory progress is discarded by reloading the last saved checkpoint.
+        """
+        if self.checkpoint is None:
+            yield None
+            return
+        checkpoint = self.checkpoint if isinstance(self.checkpoint, Checkpoint) else Checkpoint(self.checkpoint)
+        try:
+            yield checkpoint
+        except BaseException:
+            checkpoint.load()
+            raise
+    
+    def _new_records(self, records: Iterable[Dict], checkpoint: Checkpoint) -> tuple[List[Dict], Any, int]:
+        """
+        Turn 20: Drop records at or below the checkpoint watermark.
+        Returns (new records, highest new watermark key, unkeyed count).
+        Records without a usable key are dropped too: a checkpoint cannot tell
+        whether they were processed before, and counting them on every run
+        would make its totals drift. Each run reports them as unkeyed_count.
+        """
+        fresh, highest, unkeyed = [], None, 0
+        for record in records:
+            try:
+                key = self.watermark_key(record)
+            except (KeyError, ValueError, TypeError):
+                unkeyed += 1
+                continue
+            if checkpoint.is_new(key):
+                fresh.append(record)
+                if highest is None or key > highest:
+                    highest = key
+        return fresh, highest, unkeyed
+    
+    def _save_checkpoint(self, checkpoint: Checkpoint, writer: Optional[OutputWriter]) -> None:
+        """
+        Turn 20: Flush the output and dead-letter files before saving, so a
+        checkpointed batch is always on disk; after a crash the batches since
+        the last save are processed (and written) again. The output position
+        is saved with the checkpoint so a resumed run can cut those rows off.
+        """
+        if writer is not None:
+            checkpoint.output = writer.position()
+        if self.dead_letter is not None:
+            self.dead_letter.flush()
+        checkpoint.save()
+    
+    @contextmanager
+    def _output_scope(self, checkpoint: Optional[Checkpoint] = None) -> Iterator[Optional[OutputWriter]]:
+        """
+        Turn 19: Yield the output writer for one run, or None to keep records.
+        A path opens a new file per run; a writer instance stays open for the caller.
+        Turn 20: with a checkpoint that recorded this path, the file is resumed
+        at the checkpointed position instead, and the final position is noted
+        on the checkpoint for its next save.
+        """
+        if self.output is None:
+            yield None
+            return
+        with ExitStack() as stack:
+            if isinstance(self.output, OutputWriter):
+                writer = self.output
+            else:
+                resume = None if checkpoint is None else checkpoint.output
+                if resume is not None and resume['path'] != os.path.abspath(self.output):
+                    resume = None
+                writer = stack.enter_context(OutputWriter.for_path(self.output, resume))
+            yield writer
+            if checkpoint is not None:
+                checkpoint.output = writer.position()
+            else:
+                writer.flush()
+    
+    def _progress_tracker(self, total: Optional[int], name: str) -> ProgressTracker:
+        """Turn 11: Build a tracker with the pipeline's throttling and sinks"""
+        return ProgressTracker(total, name, min_interval=self.progress_interval,
+                               every=self.progress_every, sinks=self.progress_sinks)
+    
+    def _handle_invalid(self, invalid_records: List[Dict], batch_number: Optional[int] = None) -> None:
+        """Turn 16: Send invalid records to the dead-letter sink, or log them as before"""
+        if self.dead_letter is not None:
+            self.dead_letter.add_many(invalid_records)
+            return
+        
+        if invalid_records:
+            where = f" in batch {batch_number}" if batch_number is not None else ""
+            logger.warning(f"Found {len(invalid_records)} invalid records{where}")
+            for item in invalid_records:
+                logger.warning(f"  Record {item['record'].get('id')}: {item['error']}")
+    
+    def _finish_invalid(self, result: Dict) -> None:
+        """Turn 16: Flush the dead-letter sink and report its counters and location"""
+        if self.dead_letter is not None:
+            self.dead_letter.flush()
+            result['dead_letter'] = self.dead_letter.summary()
+            if result['invalid_count']:
+                logger.warning(f"{result['invalid_count']} invalid records written to {self.dead_letter.path}")
+    
+    def read_data(self, data: Union[List[Dict], str, os.PathLike],
+                  **reader_options) -> Union[List[Dict], Iterator[Dict]]:
+        """
+        Read and validate input data
+        Turn 14: Given a path to an NDJSON/CSV file (optionally .gz), return a
+        lazy iterator of records parsed in chunks, ready for process_stream().
+        reader_options are passed to DataReader.read_batches.
+        """
+        if isinstance(data, (str, os.PathLike)):
+            logger.info(f"Reading records from {data}")
+            reader_options.setdefault('batch_size', self.batch_size)
+            return chain.from_iterable(DataReader.read_batches(data, **reader_options))
+        
         logger.info(f"Reading {len(data)} records")
         return data
     
@@ -183,53 +2671,586 @@ class DataPipeline:
         """
         Turn 4: Optimized batch processing for performance
         Process raw data through validation, transformation, and aggregation.
+        Turn 23: with a cache, a stored result for the same input and settings
+        is returned without processing; result['cache'] reports the lookup.
+        Its stage timings are those of the run that stored it.
         """
         logger.info("=== Starting Data Pipeline ===")
+        if self.cache is None:
+            return self._process_uncached(raw_data)
+        
+        key = self.cache_key(raw_data)
+        result = self.cache.get(key)
+        hit = result is not None
+        if hit:
+            logger.info(f"Result cache hit for {key[:12]}; skipping processing")
+            self.total_processed = result['transformed_count']
+            self.total_errors = result['invalid_count']
+        else:
+            result = self._process_uncached(raw_data)
+            self.cache.put(key, result)
+        result['cache'] = {'hit': hit, 'key': key, **self.cache.summary()}
+        return result
+    
+    def cache_key(self, raw_data: Iterable[Dict]) -> str:
+        """
+        Turn 23: ResultCache key of raw_data under the settings that shape the
+        result: its values, and which keys it has (e.g. 'spill', the
+        stage_timings entries of the stage plan, 'batch_size').
+        """
+        executor = self.executor
+        if isinstance(executor, Executor):
+            executor = type(executor).__name__
+        config = {
+            'transform_version': self.TRANSFORM_VERSION,
+            'engine': self.engine,
+            'executor': executor,
+            'batch_size': self.batch_size,
+            'fuse_stages': self.fuse_stages,
+            'memory_budget': self.memory_budget,
+            'spill_dir': None if self.spill_dir is None else os.fspath(self.spill_dir),
+            'aggregate_partitions': self.aggregate_partitions,
+            'min_value': self.min_value,
+            'value_factor': self.value_factor,
+            'validator': [rule.fingerprint() for rule in self.validator.rules],
+            'aggregation': self.aggregation,
+            'approximate_options': self.approximate_options,
+            'autotune': self.tuner.config() if self.tuner else None
+        }
+        return ResultCache.key(raw_data, config)
+    
+    def _process_uncached(self, raw_data: List[Dict]) -> Dict:
+        """process() without the result cache"""
+        with self._checkpoint_scope() as checkpoint:
+            # Turn 20: only records above the high-water mark are processed
+            skipped_count = unkeyed_count = 0
+            if checkpoint is not None:
+                new_records, watermark, unkeyed_count = self._new_records(raw_data, checkpoint)
+                skipped_count = len(raw_data) - len(new_records) - unkeyed_count
+                raw_data = new_records
+                if skipped_count:
+                    logger.info(f"Skipping {skipped_count} records at or below watermark {checkpoint.watermark}")
+                if unkeyed_count:
+                    logger.warning(f"Skipping {unkeyed_count} records without a watermark key")
+            
+            # Turn 21: fused stages unless the caller asked for separate passes
+            plan = self.plan()
+            if plan.fused:
+                result = self._process_fused(raw_data, checkpoint, plan)
+            else:
+                result = self._process_staged(raw_data, checkpoint)
+            
+            if checkpoint is not None:
+                checkpoint.commit(watermark, {counter: result[counter] for counter in Checkpoint.COUNTERS})
+                self._save_checkpoint(checkpoint, None)
+                result['checkpoint'] = {**checkpoint.summary(), 'skipped_count': skipped_count,
+                                        'unkeyed_count': unkeyed_count}
+            return result
+    
+    def plan(self) -> StagePlan:
+        """
+        Turn 21: Choose how process() runs. With fuse_stages (or autotune), validate,
+        transform and filter always share one pass per batch (per record on
+        the records engine); aggregate joins that pass when it runs inline
+        and exactly. On a pool the fused stages run in the workers and
+        aggregation stays in this process.
+        """
+        fused = self.fuse_stages or self.tuner is not None
+        if not fused:
+            groups = [('validate',), ('transform',), ('filter',), ('aggregate',)]
+        elif self.executor is None and self.aggregation == 'exact' and not self.aggregate_partitions:
+            groups = [('validate', 'transform', 'filter', 'aggregate')]
+        else:
+            groups = [('validate', 'transform', 'filter'), ('aggregate',)]
+        if self.output is not None:
+            groups.append(('write',))
+        return StagePlan(groups, fused=fused, per_record=fused and self.engine == 'records')
+    
+    def _fused_stages(self, plan: StagePlan) -> FusedStages:
+        """Turn 21: FusedStages for the first group of a fused plan"""
+        transformer, transform = self.ENGINES[self.engine]
+        return FusedStages(self.validator, transformer, transform, self.min_value,
+                           self.value_factor, aggregate='aggregate' in plan.groups[0])
+    
+    def _process_fused(self, raw_data: List[Dict], checkpoint: Optional[Checkpoint], plan: StagePlan) -> Dict:
+        """Turn 21: process() with the stages of plan.groups[0] run in one pass per batch"""
+        logger.info(f"Stage plan: {plan}")
+        timer = StageTimer()
+        tracker = self._progress_tracker(len(raw_data), "Processing")
+        fused = self._fused_stages(plan)
+        fused_name = plan.stage_name(plan.groups[0])
+        result = {
+            'input_count': len(raw_data),
+            'valid_count': 0,
+            'invalid_count': 0,
+            'transformed_count': 0,
+            'filtered_count': 0
+        }
+        records = None if self.output is not None else []
+        
+        with ExitStack() as stack:
+            states = None if checkpoint is None else checkpoint.states
+            aggregate, aggregate_result = stack.enter_context(self._aggregation_scope(states))
+            writer = stack.enter_context(self._output_scope(checkpoint))
+            if fused.aggregate:
+                # The fused loop updates the states itself
+                states = {} if states is None else states
+                aggregate_result = partial(DataTransformer.render_states, states)
+            
+            batches = self._input_batches(raw_data)
+            if self.executor is None:
+                outcomes = (fused.run(batch, states) for batch in batches)
+            else:
+                pool = stack.enter_context(self._executor_scope())
+                max_in_flight = 2 * (self.max_workers or os.cpu_count() or 1)
+                outcomes = ordered_map(pool, fused.run, batches, max_in_flight)
+            
+            batch_number = 0
+            while True:
+                with timer.stage(fused_name):
+                    outcome = next(outcomes, None)
+                if outcome is None:
+                    break
+                batch_number += 1
+                filtered, invalid_records, valid_count, transformed_count = outcome
+                
+                self._handle_invalid(invalid_records, batch_number)
+                result['valid_count'] += valid_count
+                result['invalid_count'] += len(invalid_records)
+                result['transformed_count'] += transformed_count
+                result['filtered_count'] += len(filtered)
+                if not fused.aggregate:
+                    with timer.stage('aggregate'):
+                        aggregate(filtered)
+                if writer is not None:
+                    with timer.stage('write'):
+                        writer.write_batch(filtered)
+                else:
+                    records.extend(asdict(r) for r in filtered)
+                tracker.update(valid_count + len(invalid_records))
+                if self.tuner is not None:
+                    self.tuner.observe(valid_count + len(invalid_records))
+            
+            tracker.finish()
+            with timer.stage('aggregate'):
+                result['aggregated'] = aggregate_result()
+            if writer is not None:
+                result['output'] = writer.summary()
+        
+        self.total_errors = result['invalid_count']
+        self.total_processed = result['transformed_count']
+        result['stage_timings'] = timer.as_dict()
+        if records is not None:
+            result['records'] = records
+        if self.tuner is not None:
+            result['batch_size'] = self.tuner.summary()
+        self._finish_invalid(result)
+        logger.info("=== Pipeline Complete ===")
+        return result
+    
+    @contextmanager
+    def _batch_store(self) -> Iterator[Union[list, RecordStore]]:
+        """Turn 22: A plain list, or a RecordStore when a memory_budget is set"""
+        if self.memory_budget is None:
+            yield []
+        else:
+            with RecordStore(self.memory_budget // 2, self.spill_dir) as store:
+                yield store
+    
+    def _process_staged(self, raw_data: List[Dict], checkpoint: Optional[Checkpoint]) -> Dict:
+        """Turn 4-20: process() as separate validate, transform, filter and aggregate passes"""
+        timer = StageTimer()
         
         # Step 1: Validate
         logger.info("Step 1: Validating data...")
-        valid_records, invalid_records = DataValidator.validate_batch(raw_data)
+        with timer.stage('validate'):
+            if self.dead_letter is None:
+                valid_records, invalid_records = self.validator.validate_batch(raw_data)
+                invalid_count = len(invalid_records)
+            else:
+                # Turn 16: hand invalid records to the sink a batch at a time
+                valid_records, invalid_records, invalid_count = [], [], 0
+                for batch in iter_batches(raw_data, self.batch_size):
+                    valid, invalid = self.validator.validate_batch(batch)
+                    valid_records.extend(valid)
+                    invalid_count += len(invalid)
+                    self._handle_invalid(invalid)
         
-        if invalid_records:
-            logger.warning(f"Found {len(invalid_records)} invalid records")
-            for item in invalid_records:
-                logger.warning(f"  Record {item['record'].get('id')}: {item['error']}")
+        if self.dead_letter is None:
+            self._handle_invalid(invalid_records)
         
-        self.total_errors = len(invalid_records)
+        self.total_errors = invalid_count
         
         # Step 2: Transform with batch processing and progress tracking
         logger.info("Step 2: Transforming data...")
-        tracker = ProgressTracker(len(valid_records), "Transforming")
+        tracker = self._progress_tracker(len(valid_records), "Transforming")
         
-        transformed_records = []
-        for i, record in enumerate(valid_records):
-            if i % self.batch_size == 0 and i > 0:
-                logger.info(f"  Batch processed: {i} records")
+        # Turn 22: with a memory_budget, batches past it spill to a memory-mapped file
+        with self._batch_store() as transformed_batches, self._batch_store() as filtered_batches:
+            done = 0
+            transformed_count = 0
+            with timer.stage('transform'):
+                batches = iter_batches(valid_records, self.batch_size)
+                for transformed in self._transform_batches(batches):
+                    transformed_batches.append(transformed)
+                    transformed_count += len(transformed)
+                    batch_len = min(self.batch_size, len(valid_records) - done)
+                    done += batch_len
+                    if done < len(valid_records):
+                        logger.debug(f"  Batch processed: {done} records")
+                    
+                    tracker.update(batch_len)
+            
+            # Step 3: Filter and aggregate
+            # Turn 10: batches stay separate, so RecordBatch engines never
+            # materialize per-row objects until records are rendered
+            logger.info("Step 3: Filtering and aggregating...")
+            with timer.stage('filter'):
+                filtered_count = 0
+                for batch in transformed_batches:
+                    filtered = self.transformer.filter_by_value(batch, self.min_value)
+                    filtered_batches.append(filtered)
+                    filtered_count += len(filtered)
+            states = None if checkpoint is None else checkpoint.states
+            with timer.stage('aggregate'), self._aggregation_scope(states) as (aggregate, aggregate_result):
+                for batch in filtered_batches:
+                    aggregate(batch)
+                aggregated = aggregate_result()
+            
+            # Turn 19: filtered batches go straight to the output file, without dict copies
+            output_summary = None
+            with self._output_scope(checkpoint) as writer:
+                if writer is not None:
+                    with timer.stage('write'):
+                        for batch in filtered_batches:
+                            writer.write_batch(batch)
+                    output_summary = writer.summary()
             
-            transformed = DataTransformer.transform_record(record)
-            if transformed:
-                transformed_records.append(transformed)
+            self.total_processed = transformed_count
+            
+            logger.info("=== Pipeline Complete ===")
+            
+            result = {
+                'input_count': len(raw_data),
+                'valid_count': len(valid_records),
+                'invalid_count': invalid_count,
+                'transformed_count': transformed_count,
+                'filtered_count': filtered_count,
+                'aggregated': aggregated,
+                'stage_timings': timer.as_dict()
+            }
+            if output_summary is None:
+                if self.memory_budget is not None and filtered_batches.spilled_rows:
+                    logger.warning(f"Reading {filtered_batches.spilled_rows} spilled rows back into "
+                                   f"result['records']; set output to keep them on disk")
+                result['records'] = [asdict(r) for batch in filtered_batches for r in batch]
+            else:
+                result['output'] = output_summary
+            if self.memory_budget is not None:
+                result['spill'] = {'transformed': transformed_batches.summary(), 'filtered': filtered_batches.summary()}
+        self._finish_invalid(result)
+        return result
+    
+    def process_stream(self, raw_data: Iterable[Dict]) -> StreamingResult:
+        """
+        Turn 6: Streaming variant of process() for iterables and generators.
+        Validates, transforms, filters and aggregates one batch at a time, so
+        peak memory depends on batch_size rather than on the input size.
+        Turn 19: with an output configured, records go to the file and the
+        iterator yields none; summary['output'] describes the file.
+        """
+        summary = {
+            'input_count': 0,
+            'valid_count': 0,
+            'invalid_count': 0,
+            'transformed_count': 0,
+            'filtered_count': 0,
+            'aggregated': {},
+            'stage_timings': {}
+        }
+        return StreamingResult(self._stream_batches(raw_data, summary), summary)
+    
+    def _stream_batches(self, raw_data: Iterable[Dict], summary: Dict) -> Iterator[List[Dict]]:
+        """Run each input batch through every stage, yielding filtered records as dicts"""
+        logger.info("=== Starting Streaming Data Pipeline ===")
+        self.total_processed = 0
+        self.total_errors = 0
+        timer = StageTimer()
+        tracker = self._progress_tracker(None, "Streaming")
+        checkpoint_marks = deque()  # Turn 20: (watermark, counters) per batch in flight
+        input_sizes = deque()  # Turn 24: input rows per batch in flight, for the tuner
+        skipped_count = unkeyed_count = 0
+        
+        def validated_batches() -> Iterator[List[Dict]]:
+            nonlocal skipped_count, unkeyed_count
+            for batch_number, batch in enumerate(self._input_batches(raw_data), 1):
+                if self.tuner is not None:
+                    input_sizes.append(len(batch))
+                if checkpoint is not None:
+                    new_records, watermark, unkeyed = self._new_records(batch, checkpoint)
+                    skipped_count += len(batch) - len(new_records) - unkeyed
+                    unkeyed_count += unkeyed
+                    if unkeyed:
+                        logger.warning(f"Skipping {unkeyed} records without a watermark key")
+                    batch = new_records
+                
+                with timer.stage('validate'):
+                    valid_records, invalid_records = self.validator.validate_batch(batch)
+                
+                self._handle_invalid(invalid_records, batch_number)
+                summary['input_count'] += len(batch)
+                summary['valid_count'] += len(valid_records)
+                summary['invalid_count'] += len(invalid_records)
+                self.total_errors = summary['invalid_count']
+                tracker.update(len(batch))
+                if checkpoint is not None:
+                    checkpoint_marks.append((watermark, {
+                        'input_count': len(batch),
+                        'valid_count': len(valid_records),
+                        'invalid_count': len(invalid_records)
+                    }))
+                yield valid_records
+        
+        # Turn 7: validation runs ahead while transform batches are in flight
+        # Turn 9: aggregates are kept as states and rendered once at the end
+        # Turn 11: validation time spent inside a transform pull is charged to 'validate'
+        # Turn 20: a batch is checkpointed only after its records were yielded or written
+        with ExitStack() as stack:
+            checkpoint = stack.enter_context(self._checkpoint_scope())
+            states = None if checkpoint is None else checkpoint.states
+            aggregate, aggregate_result = stack.enter_context(self._aggregation_scope(states))
+            writer = stack.enter_context(self._output_scope(checkpoint))
+            batches_done = 0
+            transformed_batches = self._transform_batches(validated_batches())
+            while True:
+                with timer.stage('transform'):
+                    transformed_records = next(transformed_batches, None)
+                if transformed_records is None:
+                    break
+                
+                with timer.stage('filter'):
+                    filtered = self.transformer.filter_by_value(transformed_records, self.min_value)
+                with timer.stage('aggregate'):
+                    aggregate(filtered)
+                
+                summary['transformed_count'] += len(transformed_records)
+                summary['filtered_count'] += len(filtered)
+                summary['stage_timings'] = timer.as_dict()
+                self.total_processed = summary['transformed_count']
+                
+                if writer is None:
+                    yield [asdict(r) for r in filtered]
+                else:
+                    with timer.stage('write'):
+                        writer.write_batch(filtered)
+                
+                if checkpoint is not None:
+                    watermark, counts = checkpoint_marks.popleft()
+                    counts.update(transformed_count=len(transformed_records), filtered_count=len(filtered))
+                    checkpoint.commit(watermark, counts)
+                    batches_done += 1
+                    if batches_done % self.checkpoint_every == 0:
+                        self._save_checkpoint(checkpoint, writer)
+                if self.tuner is not None:
+                    self.tuner.observe(input_sizes.popleft())
             
-            tracker.update()
+            tracker.finish()
+            with timer.stage('aggregate'):
+                summary['aggregated'] = aggregate_result()
+            if writer is not None:
+                summary['output'] = writer.summary()
+            if checkpoint is not None:
+                self._save_checkpoint(checkpoint, writer)
+                summary['checkpoint'] = {**checkpoint.summary(), 'skipped_count': skipped_count,
+                                         'unkeyed_count': unkeyed_count}
+        summary['stage_timings'] = timer.as_dict()
+        if self.tuner is not None:
+            summary['batch_size'] = self.tuner.summary()
+        self._finish_invalid(summary)
+        logger.info("=== Streaming Pipeline Complete ===")
+
+
+class AsyncDataPipeline(DataPipeline):
+    """
+    Turn 13: asyncio variant of DataPipeline.
+    Read, validate, transform and aggregate run as concurrent stages joined
+    by bounded asyncio.Queues. When the sink is slow the queues fill up and
+    the upstream stages wait, so memory stays bounded by queue_size batches
+    per stage instead of growing with the input.
+    """
+    
+    _END = object()
+    
+    def __init__(self, *args, queue_size: int = 4, **kwargs):
+        super().__init__(*args, **kwargs)
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.queue_size = queue_size
+    
+    async def process_async(self, source: Union[Iterable[Dict], AsyncIterable[Dict]],
+                            sink: Optional[Callable[[List[Dict]], Any]] = None) -> Dict:
+        """
+        Process a sync or async iterable of raw records.
+        Sync iterators other than lists and tuples are read on a worker
+        thread, so a blocking source does not stall the event loop.
+        sink receives each batch of filtered records as dicts and may be a
+        coroutine function. Without a sink the records are collected into
+        result['records'] like process(); with one, 'records' is omitted.
+        Turn 19: a configured output also receives every batch, and replaces
+        result['records'] with result['output'].
+        """
+        logger.info("=== Starting Async Data Pipeline ===")
+        self.total_processed = 0
+        self.total_errors = 0
+        timer = StageTimer()
+        tracker = self._progress_tracker(None, "Streaming")
+        result = {
+            'input_count': 0,
+            'valid_count': 0,
+            'invalid_count': 0,
+            'transformed_count': 0,
+            'filtered_count': 0,
+            'aggregated': {},
+            'stage_timings': {}
+        }
+        collected = [] if sink is None and self.output is None else None
+        raw_queue = asyncio.Queue(self.queue_size)
+        valid_queue = asyncio.Queue(self.queue_size)
+        transformed_queue = asyncio.Queue(self.queue_size)
+        checkpoint_marks = deque()  # Turn 20: (watermark, counters) per batch in flight
+        skipped_count = unkeyed_count = 0
         
-        # Step 3: Filter and aggregate
-        logger.info("Step 3: Filtering and aggregating...")
-        filtered = DataTransformer.filter_by_value(transformed_records, 100)
-        aggregated = DataTransformer.aggregate_by_name(filtered)
+        async def read():
+            if hasattr(source, '__aiter__'):
+                batch = []
+                async for record in source:
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        await raw_queue.put(batch)
+                        batch = []
+                if batch:
+                    await raw_queue.put(batch)
+            elif isinstance(source, (list, tuple)):
+                for batch in iter_batches(source, self.batch_size):
+                    await raw_queue.put(batch)
+                    await asyncio.sleep(0)  # let downstream stages run between batches
+            else:
+                # A sync iterator may block on a file or socket; pull it on a
+                # worker thread so the other stages keep running meanwhile
+                loop = asyncio.get_running_loop()
+                batches = iter_batches(source, self.batch_size)
+                while (batch := await loop.run_in_executor(None, next, batches, None)) is not None:
+                    await raw_queue.put(batch)
+            await raw_queue.put(self._END)
         
-        self.total_processed = len(transformed_records)
+        async def validate(checkpoint: Optional[Checkpoint]):
+            nonlocal skipped_count, unkeyed_count
+            while (batch := await raw_queue.get()) is not self._END:
+                if checkpoint is not None:
+                    new_records, watermark, unkeyed = self._new_records(batch, checkpoint)
+                    skipped_count += len(batch) - len(new_records) - unkeyed
+                    unkeyed_count += unkeyed
+                    if unkeyed:
+                        logger.warning(f"Skipping {unkeyed} records without a watermark key")
+                    batch = new_records
+                
+                started = time.perf_counter()
+                valid_records, invalid_records = self.validator.validate_batch(batch)
+                timer.add('validate', time.perf_counter() - started)
+                
+                self._handle_invalid(invalid_records)
+                result['input_count'] += len(batch)
+                result['valid_count'] += len(valid_records)
+                result['invalid_count'] += len(invalid_records)
+                self.total_errors = result['invalid_count']
+                tracker.update(len(batch))
+                if checkpoint is not None:
+                    checkpoint_marks.append((watermark, {
+                        'input_count': len(batch),
+                        'valid_count': len(valid_records),
+                        'invalid_count': len(invalid_records)
+                    }))
+                await valid_queue.put(valid_records)
+            await valid_queue.put(self._END)
         
-        logger.info("=== Pipeline Complete ===")
+        async def transform(pool: Optional[Executor]):
+            loop = asyncio.get_running_loop()
+            while (batch := await valid_queue.get()) is not self._END:
+                started = time.perf_counter()
+                if pool is None:
+                    transformed = self._transform_batch(batch)
+                else:
+                    # CPU-bound work runs on the pool; the event loop stays free
+                    transformed = await loop.run_in_executor(pool, self._transform_batch, batch)
+                timer.add('transform', time.perf_counter() - started)
+                await transformed_queue.put(transformed)
+            await transformed_queue.put(self._END)
         
-        return {
-            'input_count': len(raw_data),
-            'valid_count': len(valid_records),
-            'invalid_count': len(invalid_records),
-            'transformed_count': len(transformed_records),
-            'filtered_count': len(filtered),
-            'aggregated': aggregated,
-            'records': [asdict(r) for r in filtered]
-        }
+        async def aggregate(add: Callable, writer: Optional[OutputWriter], checkpoint: Optional[Checkpoint]):
+            batches_done = 0
+            while (transformed := await transformed_queue.get()) is not self._END:
+                started = time.perf_counter()
+                filtered = self.transformer.filter_by_value(transformed, self.min_value)
+                filtered_at = time.perf_counter()
+                add(filtered)
+                timer.add('filter', filtered_at - started)
+                timer.add('aggregate', time.perf_counter() - filtered_at)
+                
+                result['transformed_count'] += len(transformed)
+                result['filtered_count'] += len(filtered)
+                self.total_processed = result['transformed_count']
+                
+                if writer is not None:
+                    started = time.perf_counter()
+                    writer.write_batch(filtered)
+                    timer.add('write', time.perf_counter() - started)
+                if collected is not None:
+                    collected.extend(asdict(r) for r in filtered)
+                elif sink is not None:
+                    outcome = sink([asdict(r) for r in filtered])
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                
+                if checkpoint is not None:
+                    watermark, counts = checkpoint_marks.popleft()
+                    counts.update(transformed_count=len(transformed), filtered_count=len(filtered))
+                    checkpoint.commit(watermark, counts)
+                    batches_done += 1
+                    if batches_done % self.checkpoint_every == 0:
+                        self._save_checkpoint(checkpoint, writer)
+        
+        with ExitStack() as stack:
+            pool = None if self.executor is None else stack.enter_context(self._executor_scope())
+            checkpoint = stack.enter_context(self._checkpoint_scope())
+            states = None if checkpoint is None else checkpoint.states
+            add, aggregate_result = stack.enter_context(self._aggregation_scope(states))
+            writer = stack.enter_context(self._output_scope(checkpoint))
+            stages = (read(), validate(checkpoint), transform(pool), aggregate(add, writer, checkpoint))
+            tasks = [asyncio.ensure_future(stage) for stage in stages]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # One failed stage must not leave the others blocked on a queue
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            
+            tracker.finish()
+            result['aggregated'] = aggregate_result()
+            if writer is not None:
+                result['output'] = writer.summary()
+            if checkpoint is not None:
+                self._save_checkpoint(checkpoint, writer)
+                result['checkpoint'] = {**checkpoint.summary(), 'skipped_count': skipped_count,
+                                        'unkeyed_count': unkeyed_count}
+        result['stage_timings'] = timer.as_dict()
+        self._finish_invalid(result)
+        if collected is not None:
+            result['records'] = collected
+        
+        logger.info("=== Async Pipeline Complete ===")
+        return result
 
 
 # Demonstration
@@ -275,6 +3296,132 @@ if __name__ == "__main__":
         print(f"    Min:     {agg['min']:.2f}")
         print(f"    Max:     {agg['max']:.2f}")
     
+    # Turn 7: Same rows with transform batches on a thread pool
+    parallel_result = DataPipeline(batch_size=3, executor='thread', max_workers=2).process(raw_data)
+    same = all(parallel_result[key] == result[key] for key in result
+               if key not in ('records', 'stage_timings'))
+    print(f"\nParallel matches serial: {same}")
+    
+    # Turn 11: Per-stage timings, without a log line per record
+    timings = ', '.join(f"{stage}={seconds * 1000:.2f}ms" for stage, seconds in result['stage_timings'].items())
+    print(f"Stage Timings:       {timings}")
+    
+    # Turn 12: A stricter per-feed schema compiled once into a validator
+    strict = CompiledValidator.from_dict({
+        'id': {'coerce': int, 'min_value': 1},
+        'name': {'type': str},
+        'value': {'allow_empty': True, 'coerce': float, 'min_value': 0, 'max_value': 200}
+    })
+    strict_valid, strict_invalid = strict.validate_batch(raw_data)
+    print(f"Strict schema:       {len(strict_valid)} valid, {len(strict_invalid)} invalid")
+    
+    # Turn 8: Vectorized columnar engine (falls back when NumPy is missing)
+    columnar_result = DataPipeline(batch_size=3, engine='columnar').process(raw_data)
+    print(f"Columnar aggregates match: {columnar_result['aggregated'] == result['aggregated']}")
+    
+    # Turn 10: Compact record batches share one timestamp per batch
+    batch = BatchTransformer.transform_batch(raw_data[:3])
+    print(f"RecordBatch: {len(batch)} rows, first row view: {batch[0]}")
+    
+    # Turn 9: Partial aggregates from two halves merge into the full result
+    first_half = DataTransformer.aggregate_states(
+        transform_batch(DataValidator.validate_batch(raw_data[:5])[0]))
+    second_half = DataTransformer.aggregate_states(
+        transform_batch(DataValidator.validate_batch(raw_data[5:])[0]))
+    merged = DataTransformer.merge_states(first_half, second_half)
+    merged_counts = {name: state.count for name, state in merged.items()}
+    print(f"Merged partial counts: {merged_counts}")
+    
+    # Turn 13: Async stages with bounded queues feeding a (slow) async sink
+    async def slow_sink(records: List[Dict]) -> None:
+        await asyncio.sleep(0.01)
+    
+    async_result = asyncio.run(AsyncDataPipeline(batch_size=3, queue_size=1).process_async(raw_data, slow_sink))
+    print(f"Async aggregates match: {async_result['aggregated'] == result['aggregated']}")
+    
+    # Turn 14: Stream the same rows from gzip NDJSON and CSV exports
+    with tempfile.TemporaryDirectory() as export_dir:
+        ndjson_path = os.path.join(export_dir, 'export.ndjson.gz')
+        with gzip.open(ndjson_path, 'wt', encoding='utf-8') as f:
+            f.writelines(json.dumps(row) + '\n' for row in raw_data)
+        csv_path = os.path.join(export_dir, 'export.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['id', 'name', 'value'])
+            writer.writeheader()
+            writer.writerows(raw_data)
+        
+        for path in (ndjson_path, csv_path):
+            file_summary = pipeline.process_stream(pipeline.read_data(path)).summary
+            print(f"{os.path.basename(path):20} {file_summary['filtered_count']} records, "
+                  f"aggregates match: {file_summary['aggregated'] == result['aggregated']}")
+        
+        # Turn 19: Write the filtered records to a compact columnar file instead of the result
+        columnar_path = os.path.join(export_dir, 'filtered.cols')
+        written = DataPipeline(batch_size=3, engine='batch', output=columnar_path).process(raw_data)
+        read_back = [row['id'] for block in ColumnarOutputWriter.read(columnar_path) for row in block]
+        print(f"Output file:         {written['output']['count']} {written['output']['format']} rows, "
+              f"ids {read_back}")
+    
+    # Turn 16: Invalid rows go to a dead-letter file with per-error counters
+    with tempfile.TemporaryDirectory() as dead_letter_dir:
+        with NDJSONDeadLetterSink(os.path.join(dead_letter_dir, 'invalid.ndjson'), sample_size=1) as sink:
+            dead_letter_result = DataPipeline(batch_size=3, dead_letter=sink).process(raw_data)
+        print(f"Dead letters:        {dead_letter_result['dead_letter']['counts']}")
+    
+    # Turn 17: Aggregation sharded by name across two worker processes
+    sharded_result = DataPipeline(batch_size=3, aggregate_partitions=2).process(raw_data)
+    print(f"Sharded aggregates match: {sharded_result['aggregated'] == result['aggregated']}")
+    
+    # Turn 18: Bounded-memory sketches instead of one exact entry per name
+    approximate = DataPipeline(batch_size=3, aggregation='approximate',
+                               approximate_options={'top_k': 2, 'seed': 1}).process(raw_data)['aggregated']
+    top_counts = {name: summary['count'] for name, summary in approximate['top_names'].items()}
+    print(f"Approximate:         ~{approximate['distinct_names']} distinct names, top 2 {top_counts}")
+    
+    # Turn 20: An incremental run picks up after the checkpointed first half
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        checkpoint_path = os.path.join(checkpoint_dir, 'pipeline.checkpoint.json')
+        DataPipeline(batch_size=3, checkpoint=checkpoint_path).process(raw_data[:5])
+        incremental = DataPipeline(batch_size=3, checkpoint=checkpoint_path).process(raw_data)
+        print(f"Incremental run:     skipped {incremental['checkpoint']['skipped_count']}, "
+              f"processed {incremental['input_count']}, watermark {incremental['checkpoint']['watermark']}, "
+              f"aggregates match: {incremental['aggregated'] == result['aggregated']}")
+    
+    # Turn 21: Validate, transform, filter and aggregate fused into one pass per record
+    fused_pipeline = DataPipeline(batch_size=3, fuse_stages=True)
+    fused_result = fused_pipeline.process(raw_data)
+    print(f"Fused stages:        {fused_pipeline.plan()}, "
+          f"aggregates match: {fused_result['aggregated'] == result['aggregated']}")
+    
+    # Turn 22: Separate passes under a tiny memory budget spill batches to disk
+    with tempfile.TemporaryDirectory() as spill_dir:
+        spilled = DataPipeline(batch_size=3, memory_budget=1024, spill_dir=spill_dir,
+                               output=os.path.join(spill_dir, 'spilled.ndjson')).process(raw_data)
+        print(f"Spilled batches:     {spilled['spill']['transformed']['spilled_batches']} transformed, "
+              f"aggregates match: {spilled['aggregated'] == result['aggregated']}")
+    
+    # Turn 23: The second identical run is answered from the result cache
+    with tempfile.TemporaryDirectory() as cache_dir:
+        DataPipeline(batch_size=3, cache=cache_dir).process(raw_data)
+        cached = DataPipeline(batch_size=3, cache=cache_dir).process(raw_data)
+        print(f"Cached run:          hit {cached['cache']['hit']}, {cached['cache']['entries']} entry, "
+              f"aggregates match: {cached['aggregated'] == result['aggregated']}")
+    
+    # Turn 24: Let the pipeline choose its batch size from measured throughput
+    generated = ({'id': i, 'name': f"item_{i % 7}", 'value': i % 300} for i in range(1, 200001))
+    tuned = DataPipeline(autotune=True, progress_interval=None).process_stream(generated)
+    for _ in tuned:
+        pass
+    print(f"Autotuned batch:     {tuned.summary['batch_size']['size']} rows "
+          f"(started at {tuned.summary['batch_size']['initial']}, converged: {tuned.summary['batch_size']['converged']})")
+    
+    # Turn 6: Stream the same rows from a generator, one batch at a time
+    stream = pipeline.process_stream(row for row in raw_data)
+    streamed_ids = [record['id'] for record in stream]
+    print(f"\nStreamed Records:    {streamed_ids}")
+    print(f"Streamed Summary:    {stream.summary['filtered_count']} records, "
+          f"{len(stream.summary['aggregated'])} names")
+    
     print("\n" + "=" * 70)
     print("Demonstration Complete!")
     print("=" * 70)
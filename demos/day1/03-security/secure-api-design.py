@@ -3,12 +3,20 @@ Day 1.3 Demo: Secure API Design with GitHub Copilot
 Demonstrates security best practices and patterns for API development.
 """
 
+import asyncio
 import hashlib
 import hmac
+import os
 import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from functools import wraps
-from typing import Optional, Dict, Callable
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Callable, Iterable, List
+from datetime import datetime
 import logging
 import re
 
@@ -77,36 +85,272 @@ class InputValidator:
 
 
 # Example 3: Rate limiting pattern (anti-DDoS)
+class RateLimitBackend:
+    """
+    Storage for sliding-window counters.
+    hit_many() must check and count a request atomically, so every limiter
+    sharing a backend enforces the same limits.
+    """
+    
+    @staticmethod
+    def window_of(now: float, window_seconds: float) -> tuple[int, float]:
+        """(fixed window index, weight of the previous window) at time now"""
+        window, offset = divmod(now, window_seconds)
+        return int(window), 1 - offset / window_seconds
+    
+    @staticmethod
+    def roll(state: Optional[tuple], window: int) -> tuple[int, int]:
+        """
+        (current, previous) counts of a stored (window, current, previous)
+        state as of window: the current count becomes the previous one, or
+        both expire if the key skipped a whole window.
+        """
+        if state is None:
+            return 0, 0
+        state_window, current, previous = state
+        if state_window == window:
+            return current, previous
+        if state_window == window - 1:
+            return 0, current
+        return 0, 0
+    
+    def hit(self, key: str, limit: int, window_seconds: float, now: float) -> bool:
+        """Count one request for key if its sliding-window estimate is below limit"""
+        return self.hit_many([(key, limit, window_seconds, now)])
+    
+    def hit_many(self, checks: List[tuple]) -> bool:
+        """
+        All-or-nothing hit() over (key, limit, window_seconds, now) checks:
+        count the request against every key if all have room, else against none.
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Counters for a single process (the default backend).
+    Keys idle for two windows are evicted as other keys are hit, so memory
+    is bounded by the number of active clients.
+    """
+    
+    def __init__(self):
+        # key -> [window, current count, previous count, expiry time], least recently seen first
+        self.requests: OrderedDict[str, list] = OrderedDict()
+    
+    def hit_many(self, checks: List[tuple]) -> bool:
+        states = []
+        allowed = True
+        for key, limit, window_seconds, now in checks:
+            window, previous_weight = self.window_of(now, window_seconds)
+            state = self.requests.get(key)
+            if state is None:
+                state = self.requests[key] = [window, 0, 0, 0.0]
+            elif state[0] != window:
+                state[1], state[2] = self.roll(tuple(state[:3]), window)
+                state[0] = window
+            state[3] = (window + 2) * window_seconds
+            self.requests.move_to_end(key)
+            if state[2] * previous_weight + state[1] >= limit:
+                allowed = False
+                break
+            states.append(state)
+        self._evict_idle(now)
+        
+        if allowed:
+            for state in states:
+                state[1] += 1
+        return allowed
+    
+    def _evict_idle(self, now: float) -> None:
+        """Drop keys whose counts have both expired (amortized O(1))"""
+        while self.requests:
+            oldest = next(iter(self.requests.values()))
+            if oldest[3] > now:
+                break
+            self.requests.popitem(last=False)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Counters shared by all worker processes on one host through a SQLite
+    database in WAL mode. Each decision is one BEGIN IMMEDIATE transaction,
+    which takes the write lock before reading, so check-and-increment is
+    atomic across processes and threads. Windows are numbered from
+    time.monotonic(), which the processes of one host share (but not
+    other hosts). Expired counters are deleted every sweep_every writes.
+    """
+    
+    def __init__(self, path: str, timeout: float = 5.0, sweep_every: int = 1000):
+        self.path = os.fspath(path)
+        self.timeout = timeout
+        self.sweep_every = sweep_every
+        self._local = threading.local()  # one connection per thread and process
+        self._connection()
+    
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # New thread, or a forked child that must not reuse the parent's connection
+            local.connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, window_index INTEGER NOT NULL, current_count INTEGER NOT NULL, "
+                "previous_count INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            local.pid = os.getpid()
+            local.writes = 0
+        return local.connection
+    
+    def hit_many(self, checks: List[tuple]) -> bool:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = []
+            allowed = True
+            for key, limit, window_seconds, now in checks:
+                window, previous_weight = self.window_of(now, window_seconds)
+                state = connection.execute(
+                    "SELECT window_index, current_count, previous_count FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                current, previous = self.roll(state, window)
+                if previous * previous_weight + current >= limit:
+                    allowed = False
+                    break
+                rows.append((key, window, current + 1, previous, (window + 2) * window_seconds))
+            if allowed:
+                connection.executemany(
+                    "INSERT INTO rate_limits VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "window_index = excluded.window_index, current_count = excluded.current_count, "
+                    "previous_count = excluded.previous_count, expires_at = excluded.expires_at",
+                    rows
+                )
+                self._local.writes += 1
+                if self._local.writes % self.sweep_every == 0:
+                    connection.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed
+
+
 class RateLimiter:
     """
     Implements rate limiting to prevent abuse and DDoS attacks.
     Copilot can generate these patterns when asked for "rate limiting".
+    
+    Sliding-window counter: each client keeps the number of allowed requests
+    in the current and the previous fixed window. The previous count is
+    weighted by how much of the previous window still overlaps the last
+    window_seconds, so each check is O(1) however many requests were made.
+    This is an approximation that assumes the previous window's requests were
+    spread evenly. When they were bunched at its end, the limit is exceeded:
+    any window_seconds span can admit up to 2 * max_requests requests,
+    e.g. with max_requests=5 and window_seconds=60, five requests at t=59 and
+    one more at t=61 are all allowed. Use a sliding log if the limit must hold
+    exactly for every span.
+    Time comes from a monotonic clock, which wall-clock changes cannot skew.
+    Counters live in a backend: MemoryBackend by default, or SQLiteBackend
+    to enforce one limit across worker processes.
     """
     
-    def __init__(self, max_requests: int = 100, window_seconds: int = 60):
+    def __init__(self, max_requests: int = 100, window_seconds: int = 60,
+                 clock: Callable[[], float] = time.monotonic,
+                 backend: Optional[RateLimitBackend] = None):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = {}
+        self.clock = clock
+        self.backend = backend or MemoryBackend()
     
     def is_allowed(self, client_id: str) -> bool:
         """Check if client is within rate limit"""
-        now = datetime.now()
-        
-        if client_id not in self.requests:
-            self.requests[client_id] = []
-        
-        # Remove old requests outside the window
-        cutoff = now - timedelta(seconds=self.window_seconds)
-        self.requests[client_id] = [
-            req_time for req_time in self.requests[client_id]
-            if req_time > cutoff
-        ]
-        
-        if len(self.requests[client_id]) < self.max_requests:
-            self.requests[client_id].append(now)
-            return True
-        
-        return False
+        return self.backend.hit(client_id, self.max_requests, self.window_seconds, self.clock())
+
+
+class HierarchicalRateLimiter:
+    """
+    Rate limits on several dimensions, checked in one call: per client, per
+    endpoint, per client and endpoint, and a global cap. A request is
+    admitted only if every configured limit has room, and then counts
+    against all of them; a rejected request counts against none.
+    """
+    
+    SCOPES = ('client', 'endpoint', 'client_endpoint', 'global')
+    
+    def __init__(self, limits: Dict[str, tuple[int, int]],
+                 clock: Callable[[], float] = time.monotonic,
+                 backend: Optional[RateLimitBackend] = None):
+        """limits maps scopes to (max_requests, window_seconds); omitted scopes are unlimited"""
+        unknown = set(limits) - set(self.SCOPES)
+        if unknown:
+            raise ValueError(f"Unknown rate limit scopes: {sorted(unknown)}")
+        self.limits = dict(limits)
+        self.clock = clock
+        self.backend = backend or MemoryBackend()
+        # Every request hits the global key, so lock striping would not spread
+        # the contention; one lock guards an in-memory backend instead
+        self._lock = threading.Lock() if isinstance(self.backend, MemoryBackend) else None
+    
+    def is_allowed(self, client_id: str, endpoint: str) -> bool:
+        """Check every limit for this request; charge all of them or none"""
+        now = self.clock()
+        parts = {
+            'client': (client_id,),
+            'endpoint': (endpoint,),
+            'client_endpoint': (client_id, endpoint),
+            'global': ()
+        }
+        checks = [(repr((scope,) + parts[scope]), max_requests, window_seconds, now)
+                  for scope, (max_requests, window_seconds) in self.limits.items()]
+        if self._lock is None:
+            return self.backend.hit_many(checks)
+        with self._lock:
+            return self.backend.hit_many(checks)
+
+
+class ThreadSafeRateLimiter:
+    """
+    RateLimiter for threaded servers (e.g. WSGI workers with threads).
+    Clients are sharded by id across `stripes` RateLimiters, each guarded by
+    its own lock, so concurrent calls only contend when their clients land
+    on the same stripe. (A RateLimiter on a SQLiteBackend is already
+    thread-safe; the database serializes its transactions.)
+    """
+    
+    def __init__(self, max_requests: int = 100, window_seconds: int = 60, stripes: int = 16,
+                 clock: Callable[[], float] = time.monotonic):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._stripes = [(threading.Lock(), RateLimiter(max_requests, window_seconds, clock))
+                         for _ in range(stripes)]
+    
+    def is_allowed(self, client_id: str) -> bool:
+        """Check if client is within rate limit, safely from any thread"""
+        lock, limiter = self._stripes[hash(client_id) % len(self._stripes)]
+        with lock:
+            return limiter.is_allowed(client_id)
+
+
+class AsyncRateLimiter:
+    """
+    RateLimiter for asyncio servers.
+    The O(1) check never awaits, so on the event loop it runs atomically
+    without a lock and never blocks. Use one instance per event loop.
+    """
+    
+    def __init__(self, max_requests: int = 100, window_seconds: int = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._limiter = RateLimiter(max_requests, window_seconds, clock)
+    
+    async def is_allowed(self, client_id: str) -> bool:
+        """Check if client is within rate limit"""
+        return self._limiter.is_allowed(client_id)
 
 
 # Example 4: Secure password hashing (never store plain passwords!)
@@ -114,10 +358,34 @@ class PasswordManager:
     """
     Demonstrates secure password handling.
     NEVER generate passwords in Copilot prompts - use external tools.
+    
+    The static methods hash inline. An instance adds non-blocking APIs that
+    run the hashing on a process pool, so bursts spread across cores; at
+    most max_pending jobs may be queued or running at once.
+    
+    New hashes are stored encoded as algorithm$iterations$salt$hash, so the
+    iteration count can be tuned per deployment (see calibrate()) while
+    older hashes keep verifying and are flagged by needs_rehash().
     """
     
+    ALGORITHM = 'pbkdf2_sha256'
+    # Default iterations; also those of bare (hash, salt) pairs stored before the encoded format
+    ITERATIONS = 100000
+    
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64,
+                 iterations: int = ITERATIONS):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.iterations = iterations
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+    
     @staticmethod
-    def hash_password(password: str, salt: Optional[str] = None) -> tuple[str, str]:
+    def hash_password(password: str, salt: Optional[str] = None,
+                      iterations: int = ITERATIONS) -> tuple[str, str]:
         """
         Hash password with salt using SHA-256.
         In production, use bcrypt or argon2 instead.
@@ -130,16 +398,123 @@ class PasswordManager:
             'sha256',
             password.encode('utf-8'),
             salt.encode('utf-8'),
-            100000  # iterations
+            iterations
         ).hex()
         
         return pwd_hash, salt
     
     @staticmethod
-    def verify_password(password: str, stored_hash: str, salt: str) -> bool:
-        """Verify password against stored hash"""
-        pwd_hash, _ = PasswordManager.hash_password(password, salt)
+    def encode(pwd_hash: str, salt: str, iterations: int) -> str:
+        """Encode a hash with its parameters as algorithm$iterations$salt$hash"""
+        return f"{PasswordManager.ALGORITHM}${iterations}${salt}${pwd_hash}"
+    
+    @staticmethod
+    def decode(encoded: str) -> tuple[str, int, str, str]:
+        """Split an encoded hash into (algorithm, iterations, salt, hash)"""
+        parts = encoded.split('$')
+        if len(parts) != 4 or not parts[1].isdigit():
+            raise ValueError("Malformed password hash")
+        return parts[0], int(parts[1]), parts[2], parts[3]
+    
+    def make_password(self, password: str) -> str:
+        """Hash password with this deployment's iteration count, encoded"""
+        pwd_hash, salt = self.hash_password(password, iterations=self.iterations)
+        return self.encode(pwd_hash, salt, self.iterations)
+    
+    @staticmethod
+    def verify_password(password: str, stored_hash: str, salt: Optional[str] = None) -> bool:
+        """
+        Verify password against stored hash.
+        stored_hash is an encoded hash, or a bare hash when its salt is given.
+        """
+        if salt is None:
+            algorithm, iterations, salt, stored_hash = PasswordManager.decode(stored_hash)
+            if algorithm != PasswordManager.ALGORITHM:
+                raise ValueError(f"Unsupported password hash algorithm: {algorithm}")
+        else:
+            iterations = PasswordManager.ITERATIONS
+        pwd_hash, _ = PasswordManager.hash_password(password, salt, iterations)
         return hmac.compare_digest(pwd_hash, stored_hash)
+    
+    def needs_rehash(self, stored_hash: str, salt: Optional[str] = None) -> bool:
+        """True if a verified password should be hashed again with the current parameters"""
+        if salt is not None:
+            return True  # bare (hash, salt) pair from before the encoded format
+        algorithm, iterations, _, _ = self.decode(stored_hash)
+        return algorithm != self.ALGORITHM or iterations != self.iterations
+    
+    @staticmethod
+    def calibrate(target_seconds: float = 0.1, minimum: int = ITERATIONS, step: int = 1000) -> int:
+        """
+        Iteration count that makes one hash take about target_seconds on this
+        machine. PBKDF2 time is linear in iterations, so a timed probe hash is
+        scaled up; the result is rounded to step and never below minimum.
+        """
+        probe_iterations = 20000
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            PasswordManager.hash_password('calibration', 'calibration-salt', probe_iterations)
+            timings.append(time.perf_counter() - started)
+        iterations = round(target_seconds / min(timings) * probe_iterations / step) * step
+        return max(minimum, iterations)
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        """Start the process pool on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+    
+    def _submit(self, func: Callable, *args, wait: bool = False) -> Future:
+        """
+        Run func on the pool, holding one of max_pending slots until it is done.
+        When all slots are taken, wait for one or reject the job right away.
+        """
+        if not self._slots.acquire(blocking=wait):
+            raise RuntimeError("Password hashing queue is full, retry later")
+        try:
+            future = self._pool().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+    
+    async def hash_password_async(self, password: str, salt: Optional[str] = None) -> tuple[str, str]:
+        """hash_password() with this deployment's iteration count on the process pool"""
+        return await asyncio.wrap_future(self._submit(self.hash_password, password, salt, self.iterations))
+    
+    async def make_password_async(self, password: str) -> str:
+        """make_password() on the process pool, without blocking the event loop"""
+        pwd_hash, salt = await self.hash_password_async(password)
+        return self.encode(pwd_hash, salt, self.iterations)
+    
+    async def verify_password_async(self, password: str, stored_hash: str,
+                                    salt: Optional[str] = None) -> bool:
+        """verify_password() on the process pool, without blocking the event loop"""
+        return await asyncio.wrap_future(self._submit(self.verify_password, password, stored_hash, salt))
+    
+    def verify_many(self, credentials: Iterable[tuple[str, str, str]]) -> List[bool]:
+        """
+        Verify (password, stored_hash[, salt]) tuples in parallel and return
+        the results in order. Waits for free queue slots instead of rejecting.
+        """
+        futures = [self._submit(self.verify_password, *credential, wait=True) for credential in credentials]
+        return [future.result() for future in futures]
+    
+    def close(self) -> None:
+        """Shut down the process pool once queued jobs have finished"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+    
+    def __enter__(self) -> "PasswordManager":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
 # Example 5: Secure decorator for authorization
@@ -183,10 +558,25 @@ class UserAPI:
     """
     Demonstrates security patterns for API endpoints.
     Includes input validation, error handling, and authorization.
+    Rate limits are counted per process by default; when the API runs under
+    several worker processes, pass a shared rate_limit_backend (e.g. a
+    SQLiteBackend) so RATE_LIMITS hold for all of them together.
     """
     
-    def __init__(self):
-        self.rate_limiter = RateLimiter(max_requests=50, window_seconds=60)
+    # scope -> (max_requests, window_seconds), checked together per request
+    RATE_LIMITS = {
+        'client': (50, 60),
+        'client_endpoint': (30, 60),
+        'endpoint': (1000, 60),
+        'global': (5000, 60)
+    }
+    
+    def __init__(self, password_manager: Optional[PasswordManager] = None,
+                 rate_limit_backend: Optional[RateLimitBackend] = None):
+        self.rate_limiter = HierarchicalRateLimiter(self.RATE_LIMITS, backend=rate_limit_backend)
+        self.password_manager = password_manager or PasswordManager()
+        # Checked for unknown usernames, so failed logins take the same time either way
+        self._dummy_hash = self.password_manager.make_password(secrets.token_hex(16))
         self.users = {}
     
     def create_user(self, client_id: str, username: str, email: str, password: str) -> Dict:
@@ -196,7 +586,7 @@ class UserAPI:
         """
         
         # Check rate limit
-        if not self.rate_limiter.is_allowed(client_id):
+        if not self.rate_limiter.is_allowed(client_id, 'create_user'):
             raise PermissionError("Rate limit exceeded")
         
         # Validate input
@@ -214,8 +604,8 @@ class UserAPI:
         username = InputValidator.sanitize_input(username)
         email = InputValidator.sanitize_input(email)
         
-        # Hash password (NEVER store plaintext)
-        pwd_hash, salt = PasswordManager.hash_password(password)
+        # Hash password (NEVER store plaintext); the encoded hash includes its salt
+        pwd_hash = self.password_manager.make_password(password)
         
         # Store user (in memory for demo, use database in production)
         user_id = len(self.users) + 1
@@ -224,7 +614,6 @@ class UserAPI:
             'username': username,
             'email': email,
             'password_hash': pwd_hash,
-            'salt': salt,
             'created_at': datetime.now().isoformat()
         }
         
@@ -236,11 +625,42 @@ class UserAPI:
             'created_at': self.users[user_id]['created_at']
         }
     
+    def login(self, client_id: str, username: str, password: str) -> Dict:
+        """
+        Check credentials (rate limited).
+        A stored hash with outdated parameters is replaced after a successful login.
+        """
+        
+        if not self.rate_limiter.is_allowed(client_id, 'login'):
+            raise PermissionError("Rate limit exceeded")
+        
+        user = next((u for u in self.users.values() if u['username'] == username), None)
+        if user is None:
+            self.password_manager.verify_password(password, self._dummy_hash)
+            raise PermissionError("Invalid username or password")
+        
+        salt = user.get('salt')  # only set on users stored before the encoded format
+        if not self.password_manager.verify_password(password, user['password_hash'], salt):
+            raise PermissionError("Invalid username or password")
+        
+        # The plaintext is only available now, so this is when the hash can be upgraded
+        if self.password_manager.needs_rehash(user['password_hash'], salt):
+            user['password_hash'] = self.password_manager.make_password(password)
+            user.pop('salt', None)
+            logger.info(f"Rehashed password of user {user['id']} with current parameters")
+        
+        return {
+            'id': user['id'],
+            'username': user['username'],
+            'email': user['email'],
+            'created_at': user['created_at']
+        }
+    
     @require_authentication
     def get_user(self, client_id: str, user_id: int, **kwargs) -> Dict:
         """Retrieve user (requires authentication)"""
         
-        if not self.rate_limiter.is_allowed(client_id):
+        if not self.rate_limiter.is_allowed(client_id, 'get_user'):
             raise PermissionError("Rate limit exceeded")
         
         if user_id not in self.users:
@@ -255,6 +675,12 @@ class UserAPI:
         }
 
 
+def send_shared_requests(database_path: str, requests: int) -> int:
+    """Demo worker: send requests for one client through a limiter shared via SQLite"""
+    limiter = RateLimiter(max_requests=150, window_seconds=3600, backend=SQLiteBackend(database_path))
+    return sum(limiter.is_allowed("client_shared") for _ in range(requests))
+
+
 # Demonstration
 if __name__ == "__main__":
     print("=" * 70)
@@ -286,6 +712,57 @@ if __name__ == "__main__":
         allowed = limiter.is_allowed("client_123")
         print(f"   Request {i+1}: {'Allowed' if allowed else 'Denied (rate limit)'}")
     
+    # Concurrent callers must not over-admit: 8 workers x 500 requests over
+    # 4 clients limited to 100 each. The clock is frozen so the window
+    # cannot roll over mid-test; exactly 400 requests may pass
+    # (test_secure_api_design.py checks these counts).
+    print("\n   Concurrency stress test (8 workers x 500 requests, 4 clients x 100 allowed):")
+    stress_clients = [f"client_{n}" for n in range(4)]
+    
+    def send_requests(limiter: ThreadSafeRateLimiter) -> int:
+        return sum(limiter.is_allowed(stress_clients[i % 4]) for i in range(500))
+    
+    threaded_limiter = ThreadSafeRateLimiter(max_requests=100, window_seconds=60, clock=lambda: 0.0)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        threaded_allowed = sum(pool.map(send_requests, [threaded_limiter] * 8))
+    print(f"   Threads allowed: {threaded_allowed} (expected 400)")
+    
+    async def send_requests_async(limiter: AsyncRateLimiter) -> int:
+        allowed = 0
+        for i in range(500):
+            allowed += await limiter.is_allowed(stress_clients[i % 4])
+            await asyncio.sleep(0)  # interleave with the other tasks
+        return allowed
+    
+    async def async_stress_test() -> int:
+        limiter = AsyncRateLimiter(max_requests=100, window_seconds=60, clock=lambda: 0.0)
+        return sum(await asyncio.gather(*(send_requests_async(limiter) for _ in range(8))))
+    
+    async_allowed = asyncio.run(async_stress_test())
+    print(f"   Asyncio tasks allowed: {async_allowed} (expected 400)")
+    
+    # One call checks every scope; a denied request charges none of them,
+    # so client_a's rejected 4th request leaves room for two from client_b
+    print("\n   Hierarchical limits (3 per client, 5 global):")
+    hierarchical = HierarchicalRateLimiter({'client': (3, 60), 'global': (5, 60)})
+    for client in ["client_a"] * 4 + ["client_b"] * 3:
+        allowed = hierarchical.is_allowed(client, "get_user")
+        print(f"   {client}: {'Allowed' if allowed else 'Denied (rate limit)'}")
+    
+    # Worker processes share one limit through a SQLite (WAL) backend
+    print("\n   Shared limit across 4 worker processes (4 x 100 requests, 150 allowed):")
+    with tempfile.TemporaryDirectory() as state_dir:
+        database_path = os.path.join(state_dir, 'rate-limits.db')
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            shared_allowed = sum(pool.map(send_shared_requests, [database_path] * 4, [100] * 4))
+        print(f"   Processes allowed: {shared_allowed} (expected 150)")
+        
+        sqlite_limiter = RateLimiter(max_requests=10 ** 9, backend=SQLiteBackend(database_path))
+        started = time.perf_counter()
+        for i in range(2000):
+            sqlite_limiter.is_allowed(f"client_{i % 50}")
+        print(f"   SQLite decision latency: {(time.perf_counter() - started) / 2000 * 1e6:.0f} µs")
+    
     # Example 4: Password Security
     print("\n4. Password Hashing:")
     password = "MySecurePassword123!"
@@ -296,6 +773,37 @@ if __name__ == "__main__":
     print(f"   Verification: {PasswordManager.verify_password(password, pwd_hash, salt)}")
     print(f"   Wrong password: {PasswordManager.verify_password('WrongPassword', pwd_hash, salt)}")
     
+    # A login burst verified on a process pool instead of one call after another
+    print("\n   Login burst of 8 verifications:")
+    credentials = [(password if i % 4 else 'WrongPassword', pwd_hash, salt) for i in range(8)]
+    started = time.perf_counter()
+    serial_results = [PasswordManager.verify_password(*credential) for credential in credentials]
+    serial_ms = (time.perf_counter() - started) * 1000
+    with PasswordManager(max_pending=16) as password_pool:
+        password_pool.verify_many(credentials[:1])  # start the worker processes
+        started = time.perf_counter()
+        pooled_results = password_pool.verify_many(credentials)
+        pooled_ms = (time.perf_counter() - started) * 1000
+        
+        async def async_logins() -> List[bool]:
+            return await asyncio.gather(*(password_pool.verify_password_async(*credential)
+                                          for credential in credentials[:4]))
+        
+        async_results = asyncio.run(async_logins())
+    print(f"   Inline:       {serial_ms:.0f} ms")
+    print(f"   verify_many:  {pooled_ms:.0f} ms, same results: {pooled_results == serial_results}")
+    print(f"   Async logins: {async_results}")
+    
+    # Encoded hashes carry their parameters; calibrate them per deployment
+    print("\n   Encoded hashes and calibration:")
+    iterations = PasswordManager.calibrate(target_seconds=0.05)
+    print(f"   Iterations for ~50 ms on this machine: {iterations}")
+    current_manager = PasswordManager(iterations=iterations)
+    encoded_hash = current_manager.make_password(password)
+    print(f"   Encoded: {encoded_hash[:40]}...")
+    print(f"   Verification: {PasswordManager.verify_password(password, encoded_hash)}")
+    print(f"   Legacy (hash, salt) pair needs rehash: {current_manager.needs_rehash(pwd_hash, salt)}")
+    
     # Example 5: API with Security
     print("\n5. Secure API Operations:")
     api = UserAPI()
@@ -323,6 +831,15 @@ if __name__ == "__main__":
     except ValueError as e:
         print(f"   ✓ Validation caught error: {e}")
     
+    # Log in as a user stored before the encoded format; the hash is upgraded
+    legacy_hash, legacy_salt = PasswordManager.hash_password("SecurePassword123")
+    api.users[1].update(password_hash=legacy_hash, salt=legacy_salt)
+    try:
+        api.login("client_456", "john_doe", "SecurePassword123")
+        print(f"   Logged in; stored hash is now: {api.users[1]['password_hash'][:40]}...")
+    except Exception as e:
+        print(f"   Error: {e}")
+    
     # Get user (with authentication)
     try:
         user = api.get_user("client_456", 1, authenticated=True)
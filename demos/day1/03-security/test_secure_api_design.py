@@ -0,0 +1,67 @@
+"""
+Tests for secure-api-design.py.
+Run from this directory with: python -m pytest -q
+"""
+
+import asyncio
+import importlib.util
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location('secure_api_design', Path(__file__).parent / 'secure-api-design.py')
+secure_api = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = secure_api  # worker processes unpickle functions by module name
+spec.loader.exec_module(secure_api)
+
+CLIENTS = [f"client_{n}" for n in range(4)]
+
+
+def frozen_clock():
+    """Keeps every request in one window, so exactly max_requests per client pass"""
+    return 0.0
+
+
+def send_requests(limiter):
+    return sum(limiter.is_allowed(CLIENTS[i % 4]) for i in range(500))
+
+
+def test_threads_never_over_admit():
+    limiter = secure_api.ThreadSafeRateLimiter(max_requests=100, window_seconds=60, clock=frozen_clock)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        allowed = sum(pool.map(send_requests, [limiter] * 8))
+    assert allowed == 400
+
+
+def test_asyncio_tasks_never_over_admit():
+    async def send_requests_async(limiter):
+        allowed = 0
+        for i in range(500):
+            allowed += await limiter.is_allowed(CLIENTS[i % 4])
+            await asyncio.sleep(0)  # interleave with the other tasks
+        return allowed
+    
+    async def stress_test():
+        limiter = secure_api.AsyncRateLimiter(max_requests=100, window_seconds=60, clock=frozen_clock)
+        return sum(await asyncio.gather(*(send_requests_async(limiter) for _ in range(8))))
+    
+    assert asyncio.run(stress_test()) == 400
+
+
+def test_sqlite_backend_shares_limit_across_processes(tmp_path):
+    database_path = str(tmp_path / 'rate-limits.db')
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        allowed = sum(pool.map(secure_api.send_shared_requests, [database_path] * 4, [100] * 4))
+    assert allowed == 150
+
+
+def check_user_api_limit(database_path):
+    api = secure_api.UserAPI(rate_limit_backend=secure_api.SQLiteBackend(database_path))
+    return sum(api.rate_limiter.is_allowed('client_shared', 'get_user') for _ in range(40))
+
+
+def test_user_api_rate_limits_hold_across_processes(tmp_path):
+    database_path = str(tmp_path / 'rate-limits.db')
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        allowed = sum(pool.map(check_user_api_limit, [database_path] * 2))
+    assert allowed == secure_api.UserAPI.RATE_LIMITS['client_endpoint'][0]